@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Offline benchmark of the project enrichment engine.
+
+A stubbed DataZone client with an injected latency replaces the boto3 client, the same
+domain is enriched sequentially and with a worker pool, and the outputs are
+compared to make sure the order and content are identical. tests/test_enrichment.py
+runs it with pytest and checks the speedup. Run it from the repository root
+after `pip install -e .`:
+
+    python benchmarks/enrichment.py --projects 40 --latency 0.02 --concurrency 16
+"""
+import argparse
+import json
+import time
+from unittest import mock
+
+from sm.commands import utils, cache, directory
+
+
+class StubDataZone:
+    """Minimal DataZone client answering the calls made by list_all_projects."""
+
+    def __init__(self, projects, environments, members, latency):
+        self.projects = projects
+        self.environments = environments
+        self.members = members
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self, response):
+        self.calls += 1
+        time.sleep(self.latency)
+        response['ResponseMetadata'] = {}
+        return response
+
+    def list_projects(self, domainIdentifier, **kwargs):
+        items = [{ 'id': f'p{i}', 'name': f'project-{i}', 'projectStatus': 'ACTIVE' } for i in range(self.projects)]
+        return self._call({ 'items': items })
+
+    def get_project(self, domainIdentifier, identifier):
+        return self._call({ 'id': identifier, 'name': f'project-{identifier[1:]}' })
+
+    def list_environments(self, domainIdentifier, projectIdentifier, **kwargs):
+        items = [{ 'id': f'{projectIdentifier}-e{i}', 'name': f'environment-{i}' } for i in range(self.environments)]
+        return self._call({ 'items': items })
+
+    def get_environment(self, domainIdentifier, identifier):
+        return self._call({ 'id': identifier, 'provisionedResources': [] })
+
+    def list_project_memberships(self, domainIdentifier, projectIdentifier, **kwargs):
+        members = [{ 'memberDetails': { 'user': { 'userId': f'u{i}' } } } for i in range(self.members)]
+        return self._call({ 'members': members })
+
+    def get_user_profile(self, domainIdentifier, userIdentifier, type):
+        return self._call({ 'id': userIdentifier, 'details': { 'sso': { 'username': f'{userIdentifier}@example.com' } } })
+
+
+def run(projects, environments, members, latency, concurrency):
+    """Enrich a stubbed domain, return the projects, the duration in seconds and the number of API calls."""
+    stub = StubDataZone(projects, environments, members, latency)
+    utils.set_concurrency(concurrency)
+    # each run starts without any user resolved in memory or on disk
+    cache.configure(enabled=False)
+    with mock.patch.object(utils, 'get_client', return_value=stub), mock.patch.dict(directory._directories, clear=True):
+        start = time.perf_counter()
+        result = utils.list_all_projects('dzd_benchmark')
+        elapsed = time.perf_counter() - start
+    return result, elapsed, stub.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--environments', type=int, default=3)
+    parser.add_argument('--members', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.02, help='Latency of each stubbed API call in seconds')
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    sizes = (args.projects, args.environments, args.members, args.latency)
+    sequential, sequential_time, calls = run(*sizes, 1)
+    parallel, parallel_time, _ = run(*sizes, args.concurrency)
+    if json.dumps(sequential, default=str) != json.dumps(parallel, default=str):
+        raise SystemExit('❌ Parallel enrichment returned a different result than the sequential one')
+
+    print(f"API calls:   {calls}")
+    print(f"Sequential:  {sequential_time:.2f}s")
+    print(f"Parallel:    {parallel_time:.2f}s (concurrency {args.concurrency})")
+    print(f"Speedup:     {sequential_time / parallel_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Import-time budget of the `sm` entry point.
+
+Each subcommand is started in a fresh interpreter with `python -X importtime`,
+the cumulative import cost of the top-level modules is compared to its budget
+and the script exits with an error when a budget is exceeded, or when boto3 is
+imported at all: it is only imported once an AWS client is created. The subcommands, down to a leaf
+command, also check that their lazily imported command module is part of the
+measure. Run it from the repository root after `pip install -e .`:
+
+    python benchmarks/startup.py --scale 2
+"""
+import argparse
+import subprocess
+import sys
+
+# subcommand -> (import budget in milliseconds, command module which must be imported)
+BUDGETS = {
+    '--version': (150, None),
+    'help': (150, None),
+    '--help': (150, None),
+    'status --help': (150, 'sm.commands.status'),
+    'domains --help': (150, 'sm.commands.domains'),
+    'domains describe --help': (150, 'sm.commands.domains'),
+    'accounts --help': (150, 'sm.commands.accounts'),
+    'accounts invite --help': (150, 'sm.commands.accounts'),
+    'projects --help': (150, 'sm.commands.projects'),
+    'projects list --help': (150, 'sm.commands.projects'),
+    'workflows --help': (150, 'sm.commands.workflows'),
+    'workflows run-dag --help': (150, 'sm.commands.workflows'),
+    'assets --help': (150, 'sm.commands.assets'),
+}
+
+
+def measure(command):
+    """Return the cumulative import time in milliseconds and the set of imported modules."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'sm.cli'] + command.split(),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ 'sm {command}' failed:\n{result.stderr}")
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # nested imports are indented, their cost is already included in their parent
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget, for slow machines')
+    args = parser.parse_args()
+
+    failed = False
+    for command, (budget, module) in BUDGETS.items():
+        elapsed, modules = measure(command)
+        budget = budget * args.scale
+        errors = []
+        if elapsed > budget:
+            errors.append(f"over budget ({budget:.0f} ms)")
+        if {'boto3', 'botocore'} & modules:
+            errors.append('imports boto3')
+        # the lazily imported command module must be part of the measure
+        if module and module not in modules:
+            errors.append(f"{module} not measured")
+        status = '❌' if errors else '✅'
+        print(f"{status} sm {command:<26} {elapsed:8.1f} ms {', '.join(errors)}")
+        failed = failed or bool(errors)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
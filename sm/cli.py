@@ -1,31 +1,85 @@
 import click
 import os
-import boto3
-from sm.commands.help import help as help_command
-from sm.commands.status import status as status_command
-from sm.commands.domains import register_commands as register_domains_commands
-from sm.commands.accounts import register_commands as register_accounts_commands
-from sm.commands.projects import register_commands as register_projects_commands
-from sm.commands.workflows import register_commands as register_workflows_commands
-from sm.commands.assets import register_commands as register_assets_commands
-
-@click.group()
-@click.version_option()
-def main():
+import sys
+from sm.commands import cache
+from sm.commands.parallel import DEFAULT_CONCURRENCY, set_concurrency
+
+
+class LazyGroup(click.Group):
+    """Click group importing the module of a subcommand only when the subcommand is used.
+
+    The short help of each lazy subcommand is declared with it, so listing the subcommands imports none of them.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # command name -> ('module:attribute', short help)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name in self.lazy_commands:
+            module_name, attribute = self.lazy_commands[name][0].split(':')
+            # __import__ rather than importlib.import_module, whose top module is not reported by python -X importtime
+            return getattr(__import__(module_name, fromlist=[attribute]), attribute)
+        return super().get_command(ctx, name)
+
+    def format_commands(self, ctx, formatter):
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name in self.lazy_commands:
+                rows.append((name, self.lazy_commands[name][1]))
+            else:
+                command = self.get_command(ctx, name)
+                if command is not None and not command.hidden:
+                    rows.append((name, command.get_short_help_str(limit)))
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
+
+
+def print_stats():
+    # only report on the modules the command actually used
+    clients = sys.modules.get('sm.commands.clients')
+    if clients:
+        stats = clients.get_stats()
+        click.echo(f"📊 AWS sessions: {stats['sessions']}, clients: {stats['clients']}, reused: {stats['reused']}", err=True)
+    polling = sys.modules.get('sm.commands.polling')
+    if polling:
+        for description, elapsed, ready in polling.get_timings():
+            click.echo(f"📊 Waited {elapsed:.1f}s for {description}{'' if ready else ' (not ready)'}", err=True)
+
+
+@click.group(cls=LazyGroup, lazy_commands={
+    'domains': ('sm.commands.domains:domains', 'Manage DataZone domains'),
+    'accounts': ('sm.commands.accounts:accounts', 'Manage AWS accounts in DataZone domains'),
+    'projects': ('sm.commands.projects:projects', 'Manage DataZone projects'),
+    'workflows': ('sm.commands.workflows:workflows', 'Manage workflow environments'),
+    'assets': ('sm.commands.assets:assets', 'Manage DataZone assets'),
+    'help': ('sm.commands.help:help', 'Show this help message and exit.'),
+    'status': ('sm.commands.status:status', 'Check AWS connection status.'),
+})
+@click.version_option(package_name='sm-cli')
+@click.option('--concurrency', type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True, envvar='SM_CONCURRENCY', help='Maximum number of AWS API calls running in parallel')
+@click.option('--no-cache', is_flag=True, default=False, envvar='SM_NO_CACHE', help='Do not read or write the local name to id cache')
+@click.option('--refresh', is_flag=True, default=False, help='Ignore the cached name to id resolutions and store fresh ones')
+@click.option('--stats', is_flag=True, default=False, help='Print AWS client reuse statistics and wait timings on exit')
+def main(concurrency, no_cache, refresh, stats):
     """SM Setup - AWS Resource Management CLI Tool."""
+    # boto3 is only imported once a client is created, the default session is configured through the environment
     os.environ['AWS_SHARED_CREDENTIALS_FILE'] = './credentials'
-    boto3.setup_default_session(profile_name='default', region_name='us-east-1')
-
-# Register command groups
-register_domains_commands(main)
-register_accounts_commands(main)
-register_projects_commands(main)
-register_workflows_commands(main)
-register_assets_commands(main)
-
-# Register individual commands
-main.add_command(help_command, name='help')
-main.add_command(status_command, name='status')
+    os.environ['AWS_PROFILE'] = 'default'
+    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+    set_concurrency(concurrency)
+    cache.configure(enabled=not no_cache, refresh=refresh)
+    if stats:
+        click.get_current_context().call_on_close(print_stats)
+
 
 if __name__ == "__main__":
     main()
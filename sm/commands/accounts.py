@@ -1,11 +1,13 @@
 from hashlib import file_digest
 import click
-import boto3
-from botocore.exceptions import ClientError
+from sm.commands.clients import get_client
 import json
 from dotenv import load_dotenv
-from sm.commands.utils import get_domain_id, delete_resource_shares, get_resource_shares, get_account_details, delete_project_profile
-import time
+from sm.commands import cache
+from sm.commands.utils import get_domain_id, delete_resource_shares, get_resource_shares, get_account_details, delete_project_profile, paginate
+from sm.commands.polling import wait_until
+from sm.commands.parallel import run_graph, run_parallel
+from sm.commands import catalog
 
 @click.group()
 def accounts():
@@ -25,15 +27,8 @@ def list_blueprints(domain_id, domain_name, account):
     """
     try:
         domain_id = get_domain_id(domain_name, domain_id)
-        session = boto3.Session(profile_name=account, region_name='us-east-1')
-        datazone = session.client('datazone')
-        blueprints = datazone.list_environment_blueprints(
-            domainIdentifier=domain_id,
-            managed=True,
-            maxResults=50
-        )
-        for b in blueprints['items']:
-            click.echo(f"{b['name']} - {b['id']} ")
+        for name, blueprint in catalog.get_catalog(domain_id, account).items():
+            click.echo(f"{name} - {blueprint['id']} ")
         
     except Exception as e:
         click.echo(f"❌ Error listing blueprints: {str(e)}", err=True)
@@ -53,35 +48,32 @@ def describe_blueprint(domain_id, domain_name, account, name):
     """
     try:
         domain_id = get_domain_id(domain_name, domain_id)
-        
-        session = boto3.Session(profile_name=account, region_name='us-east-1')
-        datazone = session.client('datazone')
-        
-        blueprints = datazone.list_environment_blueprints(
-            domainIdentifier=domain_id,
-            managed=True,
-            maxResults=50
-        )
-        blueprint = None
-        for b in blueprints['items']:
-            #click.echo(b['name'])
-            if b['name'] == name:
-                blueprint = b
-                break
-        if blueprint == None:
-            raise click.BadParameter(f"❌ No blueprint found with name '{name}'")
-
-        blueprint_id = blueprint['id']
-        config = datazone.get_environment_blueprint(
-            domainIdentifier=domain_id,
-            identifier=blueprint_id
-        )
-        click.echo(json.dumps(config['userParameters'], indent=2, default=str))
+        user_parameters = catalog.get_user_parameters(domain_id, name, account)
+        click.echo(json.dumps(user_parameters, indent=2, default=str))
             
     except Exception as e:
         click.echo(f"❌ Error describing blueprint: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
+@accounts.command(name='refresh-blueprints')
+@click.option('--domain-id', required=False, help='The ID of the domain')
+@click.option('--domain-name', help='The name of the domain (alternative to domain-id)')
+@click.option('--account', required=True, default='default', help='The AWS account profile name')
+def refresh_blueprints(domain_id, domain_name, account):
+    """Refresh the cached catalog of the managed blueprints of a domain and account.
+    
+    Example:
+        sm accounts refresh-blueprints --domain-name my-domain --account dev
+    """
+    try:
+        domain_id = get_domain_id(domain_name, domain_id)
+        blueprints = catalog.refresh_catalog(domain_id, account)
+        click.echo(f"✅ Refreshed {len(blueprints)} blueprints of domain {domain_id} for account {account}.")
+            
+    except Exception as e:
+        click.echo(f"❌ Error refreshing blueprints: {str(e)}", err=True)
+        click.get_current_context().exit(1)
+
 
 @accounts.command(name='list')
 @click.option('--domain-id', required=False, help='The ID of the domain')
@@ -104,19 +96,13 @@ def list_accounts(domain_id, domain_name):
         click.get_current_context().exit(1)
 
 
-def register_commands(cli):
-    """Register account commands with the main CLI"""
-    cli.add_command(accounts)
-
-
 def create_role(account, name, trust_policy, managed_policies):
     arn = None
-    session = boto3.Session(profile_name=account)
-    iam = session.client('iam')
+    iam = get_client('iam', account)
     try:
         res = iam.get_role(RoleName=name)
         arn = res['Role']['Arn']
-    except ClientError as e:
+    except iam.exceptions.ClientError:
         pass
     if not arn:
         res = iam.create_role(
@@ -195,9 +181,7 @@ def put_environment_blueprint_configuration(datazone, domain_id, blueprint_id, r
     )
 
 
-def add_policy_grant(datazone, domain_id, invitee_account_id, blueprint_id):
-    domain = datazone.get_domain(identifier=domain_id)
-    root_domain_unit_id = domain['rootDomainUnitId']
+def add_policy_grant(datazone, domain_id, invitee_account_id, blueprint_id, root_domain_unit_id):
     datazone.add_policy_grant(
         detail={"createEnvironmentFromBlueprint":{}},
         domainIdentifier=domain_id,
@@ -208,35 +192,29 @@ def add_policy_grant(datazone, domain_id, invitee_account_id, blueprint_id):
     )   
 
 
-def configure_workflow_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn):
-    session = boto3.Session(profile_name=account, region_name=region)
-    datazone = session.client('datazone')
-    workflow_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='Workflow')['items'][0]['id']
+def configure_workflow_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn, root_domain_unit_id, workflow_id):
+    datazone = get_client('datazone', account, region)
     put_environment_blueprint_configuration(datazone, domain_id, workflow_id, region, access_role_arn, provisioning_role_arn)
-    add_policy_grant(datazone, domain_id, invitee_account_id, workflow_id)
+    add_policy_grant(datazone, domain_id, invitee_account_id, workflow_id, root_domain_unit_id)
     click.echo(f"    ✅ Configured Workflow blueprint {workflow_id}.")
 
 
-def configure_datalake_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn):
-    session = boto3.Session(profile_name=account, region_name=region)
-    datazone = session.client('datazone')
-    datalake_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='DataLake')['items'][0]['id']
+def configure_datalake_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn, root_domain_unit_id, datalake_id):
+    datazone = get_client('datazone', account, region)
     put_environment_blueprint_configuration(datazone, domain_id, datalake_id, region, access_role_arn, provisioning_role_arn)
-    add_policy_grant(datazone, domain_id, invitee_account_id, datalake_id)
+    add_policy_grant(datazone, domain_id, invitee_account_id, datalake_id, root_domain_unit_id)
     click.echo(f"    ✅ Configured DataLake/LakeHouseDatabase blueprint {datalake_id}.")
 
 
-def configure_tooling_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn):
-    session = boto3.Session(profile_name=account, region_name=region)
-    datazone = session.client('datazone')
-    tooling_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='Tooling')['items'][0]['id']
+def configure_tooling_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn, root_domain_unit_id, tooling_id):
+    datazone = get_client('datazone', account, region)
 
     # need an S3 bucket
     domain_s3_bucket_prefix = f"amazon-sagemaker-{invitee_account_id}-{region}"
-    domain_s3_bucket = session.client('s3').list_buckets(Prefix=domain_s3_bucket_prefix)['Buckets'][0]['Name']
+    domain_s3_bucket = get_client('s3', account, region).list_buckets(Prefix=domain_s3_bucket_prefix)['Buckets'][0]['Name']
     if domain_s3_bucket == "null":
         domain_s3_bucket = domain_s3_bucket_prefix
-        session.client('s3').create_bucket(Bucket=domain_s3_bucket, CreateBucketConfiguration={'LocationConstraint': region})
+        get_client('s3', account, region).create_bucket(Bucket=domain_s3_bucket, CreateBucketConfiguration={'LocationConstraint': region})
         click.echo(f"        ✅ Created S3 bucket {domain_s3_bucket}.")
     else:
         click.echo(f"        ✅ The S3 bucket {domain_s3_bucket} already exists!")
@@ -244,7 +222,7 @@ def configure_tooling_blueprint(account, invitee_account_id, domain_id, region,
     # need a VPC
     # When I have the choice I'm using a specific rule which might not work everywhere
     # I'm looking for the first VPC with a tag "Name" starting with "golden"
-    ec2 = session.client('ec2')
+    ec2 = get_client('ec2', account, region)
     vpc_id = None
     vpcs = ec2.describe_vpcs()['Vpcs']
     if len(vpcs) == 1:
@@ -293,41 +271,43 @@ def configure_tooling_blueprint(account, invitee_account_id, domain_id, region,
             }
         }
     )
-    add_policy_grant(datazone, domain_id, invitee_account_id, tooling_id)
+    add_policy_grant(datazone, domain_id, invitee_account_id, tooling_id, root_domain_unit_id)
     click.echo(f"    ✅ Configured Tooling blueprint {tooling_id}.")
 
 
-def configure_blueprints(account, invitee_account_id, governance_account_id, domain_id, region):
-    access_role_arn = create_access_role(account, region, governance_account_id, domain_id)
-    provisioning_role_arn = create_provisioning_role(account, governance_account_id)
-
-    configure_workflow_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn)
-    configure_datalake_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn)
-    configure_tooling_blueprint(account, invitee_account_id, domain_id, region, access_role_arn, provisioning_role_arn) 
-
-
-def create_project_profile(account, region, invitee_account_id, governance_account_id, domain_id, template):
-    session = boto3.Session(profile_name=account, region_name=region)
-    datazone = session.client('datazone')
-    tooling_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='Tooling')['items'][0]['id']
-    datalake_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='DataLake')['items'][0]['id']
-    workflow_id = datazone.list_environment_blueprints(domainIdentifier=domain_id, managed=True, name='Workflow')['items'][0]['id']
-    
+def configure_blueprints(account, invitee_account_id, domain_id, region, governance):
+    # the roles are independent, the blueprint configurations need both of them and are independent from each other
+    roles = ['access_role', 'provisioning_role']
+    def blueprint_step(configure, name):
+        blueprint_id = governance['blueprint_ids'][name]
+        return lambda r: configure(account, invitee_account_id, domain_id, region, r['access_role'], r['provisioning_role'], governance['root_domain_unit_id'], blueprint_id)
+    _, timings = run_graph({
+        'access_role': (lambda r: create_access_role(account, region, governance['account_id'], domain_id), []),
+        'provisioning_role': (lambda r: create_provisioning_role(account, governance['account_id']), []),
+        'workflow_blueprint': (blueprint_step(configure_workflow_blueprint, 'Workflow'), roles),
+        'datalake_blueprint': (blueprint_step(configure_datalake_blueprint, 'DataLake'), roles),
+        'tooling_blueprint': (blueprint_step(configure_tooling_blueprint, 'Tooling'), roles),
+    })
+    for name, elapsed in timings.items():
+        click.echo(f"    ⏱️  {account} {name}: {elapsed:.1f}s")
+
+
+def create_project_profile(account, region, invitee_account_id, domain_id, template, governance):
+    blueprint_ids = governance['blueprint_ids']
     with open(template, 'r') as f:
         template = f.read()
     template = template.replace('${AWS_REGION}', region)
-    template = template.replace('${TOOLING_ID}', tooling_id)
-    template = template.replace('${DATALAKE_ID}', datalake_id)
-    template = template.replace('${WORKFLOW_ID}', workflow_id)
+    template = template.replace('${TOOLING_ID}', blueprint_ids['Tooling'])
+    template = template.replace('${DATALAKE_ID}', blueprint_ids['DataLake'])
+    template = template.replace('${WORKFLOW_ID}', blueprint_ids['Workflow'])
     template = template.replace('${ACCOUNT_ID}', invitee_account_id)
     config = json.loads(template)
     #click.echo(config)
 
     # will check that a project profile SQL Analytics does not already exist in the provided domain
-    datazone = boto3.client('datazone')
+    datazone = get_client('datazone')
     profile_name = f'Custom_{account}'
-    profiles = datazone.list_project_profiles(domainIdentifier=domain_id, name=profile_name)['items']
-    for profile in profiles:
+    for profile in paginate(datazone.list_project_profiles, 'items', domainIdentifier=domain_id, name=profile_name):
         if profile['name'] == profile_name:
             click.echo(f"    ✅ The project profile {profile_name} already exists in the domain {domain_id}.")
             return
@@ -339,63 +319,121 @@ def create_project_profile(account, region, invitee_account_id, governance_accou
         status="ENABLED",
         environmentConfigurations=config
     )['id']
-    domain = datazone.get_domain(identifier=domain_id)
-    root_domain_unit_id = domain['rootDomainUnitId']
+    cache.invalidate('profile', domain_id, profile_name)
     datazone.add_policy_grant(
         detail={"createProjectFromProjectProfile":{"projectProfiles":[f"{project_profile_id}"],"includeChildDomainUnits":True}},
         domainIdentifier=domain_id,
         entityType="DOMAIN_UNIT",
-        entityIdentifier=root_domain_unit_id,
+        entityIdentifier=governance['root_domain_unit_id'],
         policyType="CREATE_PROJECT_FROM_PROJECT_PROFILE",
         principal={"user":{"allUsersGrantFilter":{}}}
     )
     click.echo(f"    ✅ Created project profile {profile_name} in the domain {domain_id}.")
 
 
+def wait_for_domain_share(account, region, invitee_account_id, domain_id, share_arn):
+    """Wait for the resource share to be associated with the invited account, then for the domain to be visible from it."""
+    ram = get_client('ram')
+    def share_associated():
+        associations = paginate(ram.get_resource_share_associations, 'resourceShareAssociations', associationType='PRINCIPAL', resourceShareArns=[share_arn])
+        for association in associations:
+            if association['associatedEntity'] == invitee_account_id:
+                if association['status'] == 'FAILED':
+                    raise click.ClickException(f"Resource share association failed for {invitee_account_id}: {association.get('statusMessage')}")
+                return association['status'] == 'ASSOCIATED'
+        return False
+    wait_until(share_associated, f"resource share association of {invitee_account_id}")
+
+    datazone = get_client('datazone', account, region)
+    def domain_visible():
+        try:
+            datazone.get_domain(identifier=domain_id)
+            return True
+        except datazone.exceptions.ClientError:
+            return False
+    wait_until(domain_visible, f"domain {domain_id} visibility from {account}")
+
+
+BLUEPRINT_NAMES = ['Tooling', 'DataLake', 'Workflow']
+
+
+def load_governance(domain_id):
+    """Resolve once the governance side information shared by the invitations of several accounts."""
+    datazone = get_client('datazone')
+    return {
+        'account_id': get_account_details('default')['Account'],
+        'root_domain_unit_id': datazone.get_domain(identifier=domain_id)['rootDomainUnitId'],
+        'blueprint_ids': { name: catalog.get_blueprint_id(domain_id, name) for name in BLUEPRINT_NAMES },
+    }
+
+
+def invite_account(account, domain_id, region, template, governance):
+    # load the credentials and id of the invited account
+    invitee_identity = get_account_details(account)
+    invitee_account_id = invitee_identity['Account']
+
+    # create the ram resource share in the governance account
+    ram = get_client('ram')
+    share = ram.create_resource_share(
+        name=f"DataZone-EXTENDED_ACCESS-{domain_id}-ORG-ONLY",
+        principals=[invitee_account_id],
+        resourceArns=[f"arn:aws:datazone:{region}:{governance['account_id']}:domain/{domain_id}"],
+        permissionArns=["arn:aws:ram::aws:permission/AWSRAMPermissionsAmazonDatazoneDomainExtendedServiceAccess"],
+        allowExternalPrincipals=False
+    )
+    click.echo(f"    ✅ Configured resource share for {invitee_account_id}, wait for the domain share to be ready...")
+    wait_for_domain_share(account, region, invitee_account_id, domain_id, share['resourceShare']['resourceShareArn'])
+
+    # configure blueprints in the invited account
+    configure_blueprints(account, invitee_account_id, domain_id, region, governance)
+
+    # configure a project profile in the governance account
+    create_project_profile(account, region, invitee_account_id, domain_id, template, governance)
+    return invitee_account_id
+
+
 @accounts.command(name='invite')
 @click.option('--domain-id', required=False, help='The ID of the domain')
 @click.option('--domain-name', help='The name of the domain (alternative to domain-id)')
-@click.option('--account', required=True, help='The AWS account profile name to invite')
+@click.option('--account', 'accounts_to_invite', multiple=True, help='The AWS account profile name to invite, repeat the option to invite several accounts')
+@click.option('--accounts-file', type=click.File('r'), help='File listing the AWS account profile names to invite, one per line')
 @click.option('--template', required=True, help='Template to use for project profile')
-def invite(domain_id, domain_name, account, template):
-    """Invite an AWS account to join DataZone domains.
+def invite(domain_id, domain_name, accounts_to_invite, accounts_file, template):
+    """Invite AWS accounts to join DataZone domains.
     
     This command helps manage AWS account invitations to DataZone domains.
+    Several accounts are invited concurrently, the failure of one account does not stop the others.
     
     Example:
-        sm accounts invite --domain-name my-domain --account dev
-        sm accounts invite --domain-id dzd_xxxxxxxxx --account test --template custom
+        sm accounts invite --domain-name my-domain --account dev --template project-profile-template.json
+        sm accounts invite --domain-id dzd_xxxxxxxxx --account dev --account test --account prod --template custom.json
+        sm accounts invite --domain-name my-domain --accounts-file accounts.txt --template custom.json
     """
     try:
+        accounts_to_invite = list(accounts_to_invite)
+        if accounts_file:
+            accounts_to_invite += [line.strip() for line in accounts_file if line.strip() and not line.startswith('#')]
+        accounts_to_invite = list(dict.fromkeys(accounts_to_invite))
+        if not accounts_to_invite:
+            raise click.BadParameter("Please provide --account or --accounts-file")
+
         domain_id = get_domain_id(domain_name, domain_id)
         region = 'us-east-1'
-
-        # load the credentials and id of the invited account
-        invitee_identity = get_account_details(account)
-        invitee_account_id = invitee_identity['Account']
-
-        # create the ram resource share in the governance account
-        governance_identity = get_account_details('default')
-        governance_account_id = governance_identity['Account']
-
-        ram = boto3.client('ram')
-        ram.create_resource_share(
-            name=f"DataZone-EXTENDED_ACCESS-{domain_id}-ORG-ONLY",
-            principals=[invitee_account_id],
-            resourceArns=[f'arn:aws:datazone:{region}:{governance_account_id}:domain/{domain_id}'],
-            permissionArns=["arn:aws:ram::aws:permission/AWSRAMPermissionsAmazonDatazoneDomainExtendedServiceAccess"],
-            allowExternalPrincipals=False
-        )
-        click.echo(f"    ✅ Configured resource share for {invitee_account_id}, wait for the domain share to be ready...")
-        time.sleep(15)
-
-        # configure blueprints in the invited account
-        configure_blueprints(account, invitee_account_id, governance_account_id, domain_id, region)
-
-        # configure a project profile in the governance account
-        create_project_profile(account, region, invitee_account_id, governance_account_id, domain_id, template)
-
-        click.echo(f"✅ Account {account} ({invitee_account_id}) joined the domain {domain_name} ({domain_id}).")
+        governance = load_governance(domain_id)
+
+        def invite_one(account):
+            try:
+                invitee_account_id = invite_account(account, domain_id, region, template, governance)
+                click.echo(f"✅ Account {account} ({invitee_account_id}) joined the domain {domain_name} ({domain_id}).")
+                return None
+            except Exception as e:
+                click.echo(f"❌ Error inviting account {account}: {str(e)}", err=True)
+                return str(e)
+        errors = dict(zip(accounts_to_invite, run_parallel(invite_one, accounts_to_invite)))
+
+        failed = [account for account, error in errors.items() if error]
+        if failed:
+            raise click.ClickException(f"{len(failed)} of {len(errors)} accounts failed: {', '.join(failed)}")
 
     except Exception as e:
         click.echo(f"❌ Error processing account invitation: {str(e)}", err=True)
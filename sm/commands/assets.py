@@ -1,7 +1,6 @@
 import click
-import boto3
-from sm.commands.utils import get_domain_id
-from sm.commands.projects import get_project
+from sm.commands.clients import get_client
+from sm.commands.utils import get_domain_id, resolve_project_id
 import json
 
 @click.group()
@@ -19,8 +18,7 @@ def grant_access(domain_id, domain_name, location, project_name, account):
     """Grant access to an S3 location."""
     try:
         domain_id = get_domain_id(domain_name, domain_id)
-        session = boto3.Session(profile_name=account)
-        lakeformation = session.client('lakeformation')
+        lakeformation = get_client('lakeformation', account)
 
         # get the project details
         # get the role arn associated to the project
@@ -42,11 +40,9 @@ def publish(domain_id, domain_name, project_name, asset_name, account):
     """Publish a data asset in DataZone."""
     try:
         domain_id = get_domain_id(domain_name, domain_id)
-        project = get_project(domain_id, project_name)
-        project_id = project['id']
+        project_id = resolve_project_id(domain_id, project_name)
 
-        session = boto3.Session(profile_name=account, region_name='us-east-1')
-        datazone = session.client('datazone')
+        datazone = get_client('datazone', account)
 
         table = {
             'databaseName':'prod_poc_prod_glue_db',
@@ -93,7 +89,3 @@ def publish(domain_id, domain_name, project_name, asset_name, account):
     except Exception as e:
         click.echo(f"❌ Error publishing asset: {str(e)}", err=True)
         click.get_current_context().exit(1)
-
-def register_commands(cli):
-    """Register asset commands with the main CLI"""
-    cli.add_command(assets)
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows, writes stay atomic but concurrent updates may be lost
+    fcntl = None
+
+# time to live of the cached name to id resolutions, in seconds
+TTLS = {
+    'domain': 24 * 3600,
+    'project': 3600,
+    'profile': 6 * 3600,
+    'blueprint-summary': 24 * 3600,
+    'blueprint-parameters': 7 * 24 * 3600,
+    'mwaa': 3600,
+    'users': 6 * 3600,
+}
+
+_enabled = True
+_refresh = False
+
+
+def configure(enabled=True, refresh=False):
+    """--no-cache disables the cache, --refresh ignores the cached values but stores the new ones."""
+    global _enabled, _refresh
+    _enabled = enabled
+    _refresh = refresh
+
+
+def is_enabled():
+    return _enabled
+
+
+def cache_path():
+    return os.environ.get('SM_CACHE_FILE', os.path.join(os.path.expanduser('~'), '.sm', 'cache.json'))
+
+
+def document_path(*parts):
+    """Path of a document stored next to the cache file, for data too large or too sensitive to share the cache file."""
+    return os.path.join(os.path.dirname(cache_path()), *parts)
+
+
+@contextmanager
+def _locked(exclusive, path=None):
+    path = path or cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield path
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # the cached data is only readable by its owner
+    with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _update(fn):
+    try:
+        with _locked(True) as path:
+            data = _read(path)
+            fn(data)
+            _write(path, data)
+    except OSError:
+        pass  # the cache is an optimization, a read-only home directory should not break the CLI
+
+
+def get(entity, *key):
+    """Return the cached id of an entity or None when missing, expired, or when the cache is bypassed."""
+    if not _enabled or _refresh:
+        return None
+    try:
+        with _locked(False) as path:
+            entry = _read(path).get(entity, {}).get('/'.join(key))
+    except OSError:
+        return None
+    if not entry or entry['expires'] < time.time():
+        return None
+    return entry['value']
+
+
+def put(entity, value, *key):
+    if not _enabled:
+        return
+    def update(data):
+        now = time.time()
+        entries = data.setdefault(entity, {})
+        for k in [k for k, entry in entries.items() if entry['expires'] < now]:
+            del entries[k]
+        entries['/'.join(key)] = { 'value': value, 'expires': now + TTLS[entity] }
+    _update(update)
+
+
+def invalidate(entity, *key):
+    """Remove the cached entries matching the key, or all the entries nested under it (ex. all projects of a domain).
+
+    The entries are removed even when the cache is disabled, so a later cached run does not return a deleted entity.
+    """
+    if not os.path.exists(cache_path()):
+        return
+    prefix = '/'.join(key)
+    def update(data):
+        entries = data.get(entity, {})
+        for k in [k for k in entries if k == prefix or k.startswith(prefix + '/')]:
+            del entries[k]
+    _update(update)
+
+
+def get_document(path):
+    """Return the value of a document written by put_document, or None when missing, expired, or when the cache is bypassed."""
+    if not _enabled or _refresh:
+        return None
+    try:
+        with _locked(False, path):
+            document = _read(path)
+    except OSError:
+        return None
+    if not document or document['expires'] < time.time():
+        return None
+    return document['value']
+
+
+def put_document(entity, value, path, since=None):
+    """Store a value in its own file, it expires after the time to live of its entity counted from since (default: now)."""
+    if not _enabled:
+        return
+    try:
+        with _locked(True, path):
+            _write(path, { 'value': value, 'expires': (since or time.time()) + TTLS[entity] })
+    except OSError:
+        pass
+
+
+def delete_document(path):
+    try:
+        with _locked(True, path):
+            os.remove(path)
+    except OSError:
+        pass
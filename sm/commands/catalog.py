@@ -0,0 +1,70 @@
+import threading
+import click
+from sm.commands import cache
+from sm.commands.clients import get_client, DEFAULT_PROFILE
+from sm.commands.utils import paginate
+
+# managed blueprints of a domain as seen from an account, {(domain_id, account): {name: {'id', 'revision'}}}
+_lock = threading.Lock()
+_catalogs = {}
+# user parameters of a blueprint revision, {(domain_id, account, blueprint_id, revision): userParameters}
+_parameters = {}
+
+
+def _revision(blueprint):
+    # blueprints carry no version number, their last update time identifies a revision
+    return str(blueprint.get('updatedAt') or blueprint.get('createdAt') or '')
+
+
+def get_catalog(domain_id, account=DEFAULT_PROFILE):
+    """Return the managed blueprints of a domain by name, fetched once per process and cached on disk."""
+    key = (domain_id, account)
+    with _lock:
+        if key not in _catalogs:
+            catalog = cache.get('blueprint-summary', domain_id, account)
+            if catalog is None:
+                datazone = get_client('datazone', account)
+                catalog = {
+                    b['name']: { 'id': b['id'], 'revision': _revision(b) }
+                    for b in paginate(datazone.list_environment_blueprints, 'items', domainIdentifier=domain_id, managed=True, maxResults=50)
+                }
+                cache.put('blueprint-summary', catalog, domain_id, account)
+            _catalogs[key] = catalog
+        return _catalogs[key]
+
+
+def get_blueprint(domain_id, name, account=DEFAULT_PROFILE):
+    blueprint = get_catalog(domain_id, account).get(name)
+    if blueprint is None:
+        raise click.ClickException(f"Blueprint '{name}' not found in domain '{domain_id}'.")
+    return blueprint
+
+
+def get_blueprint_id(domain_id, name, account=DEFAULT_PROFILE):
+    return get_blueprint(domain_id, name, account)['id']
+
+
+def get_user_parameters(domain_id, name, account=DEFAULT_PROFILE):
+    """Return the userParameters schema of a blueprint, fetched once per blueprint revision."""
+    blueprint = get_blueprint(domain_id, name, account)
+    key = (domain_id, account, blueprint['id'], blueprint['revision'])
+    with _lock:
+        if key not in _parameters:
+            parameters = cache.get('blueprint-parameters', *key)
+            if parameters is None:
+                datazone = get_client('datazone', account)
+                parameters = datazone.get_environment_blueprint(domainIdentifier=domain_id, identifier=blueprint['id'])['userParameters']
+                cache.put('blueprint-parameters', parameters, *key)
+            _parameters[key] = parameters
+        return _parameters[key]
+
+
+def refresh_catalog(domain_id, account=DEFAULT_PROFILE):
+    """Drop the cached catalog and parameters of a domain and account, then fetch the catalog again."""
+    with _lock:
+        _catalogs.pop((domain_id, account), None)
+        for key in [k for k in _parameters if k[:2] == (domain_id, account)]:
+            del _parameters[key]
+    cache.invalidate('blueprint-summary', domain_id, account)
+    cache.invalidate('blueprint-parameters', domain_id, account)
+    return get_catalog(domain_id, account)
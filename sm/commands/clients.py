@@ -0,0 +1,49 @@
+import threading
+from sm.commands.parallel import get_concurrency
+
+DEFAULT_PROFILE = 'default'
+DEFAULT_REGION = 'us-east-1'
+
+# boto3 sessions are not thread safe, sessions and clients are created under a lock and clients are shared
+_lock = threading.Lock()
+_sessions = {}
+_clients = {}
+_stats = { 'sessions': 0, 'clients': 0, 'reused': 0 }
+
+
+def _get_session(profile, region):
+    key = (profile, region)
+    if key not in _sessions:
+        # boto3 takes a few hundred milliseconds to import, it is only imported once a client is needed
+        import boto3
+        _sessions[key] = boto3.Session(profile_name=profile, region_name=region)
+        _stats['sessions'] += 1
+    return _sessions[key]
+
+
+def get_session(profile=DEFAULT_PROFILE, region=DEFAULT_REGION):
+    """Return the cached session of a profile and region."""
+    with _lock:
+        return _get_session(profile, region)
+
+
+def get_client(service, profile=DEFAULT_PROFILE, region=DEFAULT_REGION):
+    """Return the cached client of a service for a profile and region, its connection pool is sized to the CLI concurrency."""
+    key = (profile, region, service)
+    with _lock:
+        client = _clients.get(key)
+        if client:
+            _stats['reused'] += 1
+            return client
+        from botocore.config import Config
+        session = _get_session(profile, region)
+        config = Config(max_pool_connections=max(10, get_concurrency()))
+        client = session.client(service, config=config)
+        _clients[key] = client
+        _stats['clients'] += 1
+        return client
+
+
+def get_stats():
+    with _lock:
+        return dict(_stats)
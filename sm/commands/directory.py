@@ -0,0 +1,110 @@
+import threading
+import time
+import click
+from sm.commands import cache
+from sm.commands.pagination import paginate
+
+# user directory of each domain, shared by all the commands of a process
+_lock = threading.Lock()
+_directories = {}
+
+
+def _username(profile):
+    return profile.get('details', {}).get('sso', {}).get('username', '').lower()
+
+
+class UserDirectory:
+    """Index of the SSO user profiles of a domain by id and by email, stored in its own file next to the cache.
+
+    The full directory is paged once, when an email is looked up for the first time. Later misses are
+    resolved one user at a time and merged into the index, call save() to store them on disk. Merging them
+    does not extend the life of the stored directory, it expires a time to live after it was created or paged.
+    Without cache, emails are resolved with a targeted search instead of paging the directory.
+    """
+
+    def __init__(self, datazone, domain_id):
+        self.datazone = datazone
+        self.domain_id = domain_id
+        self.path = cache.document_path('users', f"{domain_id}.json")
+        self.lock = threading.Lock()
+        self.dirty = False
+        data = cache.get_document(self.path) or {}
+        self.complete = data.get('complete', False)
+        # time of the creation or of the last full page of the directory, the stored directory expires from it
+        self.since = data.get('since')
+        self.by_id = data.get('users', {})
+        # emails resolved by a unique search hit, for users whose username is not their email
+        self.aliases = data.get('aliases', {})
+        self.by_email = { _username(profile): user_id for user_id, profile in self.by_id.items() if _username(profile) }
+
+    def _add(self, profile):
+        profile = { k: v for k, v in profile.items() if k != 'ResponseMetadata' }
+        self.by_id[profile['id']] = profile
+        if _username(profile):
+            self.by_email[_username(profile)] = profile['id']
+        self.dirty = True
+        return profile
+
+    def _search(self, text=None):
+        """Add the profiles matching text, or all the profiles, to the index and return them."""
+        kwargs = { 'domainIdentifier': self.domain_id, 'userType': 'SSO_USER', 'maxResults': 50 }
+        if text:
+            kwargs['searchText'] = text
+        return [self._add(profile) for profile in paginate(self.datazone.search_user_profiles, 'items', **kwargs)]
+
+    def _lookup(self, email):
+        return self.by_email.get(email) or self.aliases.get(email)
+
+    def find_by_email(self, email):
+        """Return the profile whose SSO username is the email, or else the single profile found by searching the email."""
+        email = email.lower()
+        with self.lock:
+            if not self._lookup(email) and not self.complete and cache.is_enabled():
+                self.since = time.time()
+                self._search()
+                self.complete = True
+            user_id = self._lookup(email)
+            if not user_id:
+                # the user may have been added since the directory was paged, or its username may not be its email
+                hits = self._search(email)
+                user_id = self._lookup(email)
+                if not user_id and len(hits) > 1:
+                    raise click.ClickException(f"'{email}' matches {len(hits)} SSO users in domain '{self.domain_id}', none with this username.")
+                if not user_id and hits:
+                    user_id = self.aliases[email] = hits[0]['id']
+        if not user_id:
+            raise click.ClickException(f"No SSO user found for '{email}' in domain '{self.domain_id}'.")
+        return self.by_id[user_id]
+
+    def get(self, user_id):
+        """Return the profile of a user id, a missing user is fetched and merged into the index."""
+        with self.lock:
+            profile = self.by_id.get(user_id)
+        if profile:
+            return profile
+        profile = self.datazone.get_user_profile(domainIdentifier=self.domain_id, userIdentifier=user_id, type='SSO')
+        profile.setdefault('id', user_id)
+        with self.lock:
+            return self._add(profile)
+
+    def save(self):
+        with self.lock:
+            if self.dirty:
+                self.since = self.since or time.time()
+                cache.put_document('users', { 'complete': self.complete, 'since': self.since, 'users': self.by_id, 'aliases': self.aliases }, self.path, self.since)
+                self.dirty = False
+
+
+def get_directory(datazone, domain_id):
+    with _lock:
+        if domain_id not in _directories:
+            _directories[domain_id] = UserDirectory(datazone, domain_id)
+        return _directories[domain_id]
+
+
+def find_user_id(datazone, domain_id, email):
+    """Resolve an email to a user id through the directory of the domain and store the directory."""
+    directory = get_directory(datazone, domain_id)
+    user_id = directory.find_by_email(email)['id']
+    directory.save()
+    return user_id
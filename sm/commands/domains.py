@@ -1,8 +1,14 @@
 import click
-import boto3
+from sm.commands.clients import get_client
 from pprint import pformat
 import json
-from sm.commands.utils import get_domain_id, delete_resource_shares, list_all_projects, delete_project_profile
+import time
+from sm.commands import cache
+from sm.commands.utils import get_domain_id, domain_cache_key, iter_projects, SUMMARY, FULL, paginate, run_parallel
+from sm.commands import teardown
+from sm.commands.output import OUTPUT_FORMATS, get_emitter
+from sm.commands.polling import poll
+from sm.commands.directory import get_directory, find_user_id
 
 @click.group()
 def domains():
@@ -13,14 +19,10 @@ def domains():
 def list_domains():
     """List all DataZone domains in the current AWS account."""
     try:
-        datazone = boto3.client('datazone')
-        domains = datazone.list_domains()['items']
-        
-        if not domains:
-            click.echo("No SageMaker domains found.")
-            return
-
-        for domain_summary in domains:
+        datazone = get_client('datazone')
+        found = False
+        for domain_summary in paginate(datazone.list_domains, 'items'):
+            found = True
             domain_id = domain_summary['id']
             try:
                 details = datazone.get_domain(identifier=domain_id)
@@ -30,81 +32,111 @@ def list_domains():
                 click.echo(f"\n- Could not get details for Domain ID: {domain_id}")
                 click.echo(f"  Error: {str(detail_error)}", err=True)
 
+        if not found:
+            click.echo("No SageMaker domains found.")
+
     except Exception as e:
         click.echo(f"❌ Error listing SageMaker domains: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
+def get_domain_units(datazone, domain_id, root_unit_id, root_unit_name, user_details=True):
+    """Walk the domain unit tree level by level, the units of a level are fetched in parallel and each owner is looked up once."""
+    def load_domain_unit(unit):
+        unit['_users'] = list(paginate(datazone.list_entity_owners, 'owners', domainIdentifier=domain_id, entityIdentifier=unit['_id'], entityType='DOMAIN_UNIT'))
+        children = paginate(datazone.list_domain_units_for_parent, 'items', domainIdentifier=domain_id, parentDomainUnitIdentifier=unit['_id'])
+        unit['_children'] = [{ '_id': child['id'], '_name': child['name'] } for child in children]
+
+    root = { '_id': root_unit_id, '_name': root_unit_name }
+    level = [root]
+    owners = []
+    while level:
+        run_parallel(load_domain_unit, level)
+        owners += [owner['user'] for unit in level for owner in unit['_users'] if 'user' in owner]
+        level = [child for unit in level for child in unit['_children']]
+    if not user_details:
+        return root
+
+    user_ids = list(dict.fromkeys(owner['userId'] for owner in owners))
+    directory = get_directory(datazone, domain_id)
+    details = dict(zip(user_ids, run_parallel(lambda user_id: directory.get(user_id)['details'], user_ids)))
+    directory.save()
+    for owner in owners:
+        owner['_user_details'] = details[owner['userId']]
+    return root
+
+
+DESCRIBE_SECTIONS = ['domain', 'domain-units', 'blueprints', 'blueprint-configurations', 'profiles', 'projects']
+
+
 @domains.command(name='describe')
 @click.option('--id', required=False, help='The ID of the domain to describe')
 @click.option('--name', required=False, help='The Name of the domain to describe')
-def describe(id, name):
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='json', show_default=True, help='json writes one document, ndjson writes one record per entity')
+@click.option('--include', multiple=True, type=click.Choice(DESCRIBE_SECTIONS), help='Sections to describe, repeat the option to select several sections (default: all)')
+@click.option('--exclude', multiple=True, type=click.Choice(DESCRIBE_SECTIONS), help='Sections to skip, repeat the option to skip several sections')
+@click.option('--depth', type=click.IntRange(0, 1), default=1, show_default=True, help='0 only lists the items of each section, 1 also fetches their details')
+def describe(id, name, output, include, exclude, depth):
     """Display detailed information about a specific domain.
     
+    Each section is written as soon as it is fetched, sections which are not selected cost no API call.
+
     Example:
         sm domains describe --id dzd_4s9s40qvcqalpj
-        sm domains describe --name my-domain
+        sm domains describe --name my-domain --output ndjson
+        sm domains describe --name my-domain --include profiles --depth 0
     """
     try:
-        datazone = boto3.client('datazone')
-        result = {}
+        datazone = get_client('datazone')
+        emitter = get_emitter(output)
         domain_id = get_domain_id(name, id)
         if not domain_id:
             click.echo("❌ Either --id or --name must be provided", err=True)
             click.get_current_context().exit(1)
 
+        sections = [section for section in (include or DESCRIBE_SECTIONS) if section not in exclude]
+
         # Get domain details
-        domain = datazone.get_domain(identifier=domain_id)
-        del domain['ResponseMetadata']
-        result['_domain'] = domain
+        if 'domain' in sections or 'domain-units' in sections:
+            domain = datazone.get_domain(identifier=domain_id)
+            del domain['ResponseMetadata']
+        if 'domain' in sections:
+            emitter.section('_domain', domain)
 
         # Get the list of domain units, build a hierarchical structure, and include the users details
-        def get_domain_units(domain_id, parent_unit_id, parent_unit_name):
-            res = { '_id': parent_unit_id, '_name': parent_unit_name }
-            domain_unit_users = datazone.list_entity_owners(domainIdentifier=domain_id, entityIdentifier=parent_unit_id, entityType='DOMAIN_UNIT')['owners']
-            for user in domain_unit_users:
-                user_id = user['user']['userId']
-                user_details = datazone.get_user_profile(domainIdentifier=domain_id, userIdentifier=user_id, type='SSO')['details']
-                user['user']['_user_details'] = user_details
-            res['_users'] = domain_unit_users
-            child_domain_units = datazone.list_domain_units_for_parent(domainIdentifier=domain_id, parentDomainUnitIdentifier=parent_unit_id)['items']
-            res['_children'] = []
-            for child_domain_unit in child_domain_units:
-                res['_children'].append(get_domain_units(domain_id, child_domain_unit['id'], child_domain_unit['name']))
-            return res
-        root_unit_id = domain['rootDomainUnitId']
-        root_unit_name = domain['name']
-        domain_units = get_domain_units(domain_id, root_unit_id, root_unit_name)
-        result['_domain_units'] = domain_units
-
-        for flag in [ True, False ]:
-            response = datazone.list_environment_blueprints(
-                domainIdentifier=domain_id,
-                managed=flag,
-                maxResults=50
-            )
-            result['_environment_blueprints_' + str(flag)] = response['items']
-            for environment_blueprint in response['items']:
-                environment_blueprint['_details'] = datazone.get_environment_blueprint(domainIdentifier=domain_id, identifier=environment_blueprint['id'])
-                del environment_blueprint['_details']['ResponseMetadata']
-        
+        if 'domain-units' in sections:
+            domain_units = get_domain_units(datazone, domain_id, domain['rootDomainUnitId'], domain['name'], user_details=depth > 0)
+            emitter.tree_section('_domain_units', domain_units)
 
-        response = datazone.list_environment_blueprint_configurations(
-            domainIdentifier=domain_id
-        )
-        result['_environment_blueprint_configurations'] = response['items']
-        for environment_blueprint_configuration in response['items']:
-            environment_blueprint_configuration['_details'] = datazone.get_environment_blueprint_configuration(domainIdentifier=domain_id, environmentBlueprintIdentifier=environment_blueprint_configuration['environmentBlueprintId'])
-            del environment_blueprint_configuration['_details']['ResponseMetadata']
+        def environment_blueprints(flag):
+            for environment_blueprint in paginate(datazone.list_environment_blueprints, 'items', domainIdentifier=domain_id, managed=flag, maxResults=50):
+                if depth > 0:
+                    environment_blueprint['_details'] = datazone.get_environment_blueprint(domainIdentifier=domain_id, identifier=environment_blueprint['id'])
+                    del environment_blueprint['_details']['ResponseMetadata']
+                yield environment_blueprint
+        if 'blueprints' in sections:
+            for flag in [ True, False ]:
+                emitter.list_section('_environment_blueprints_' + str(flag), environment_blueprints(flag))
 
-        response = datazone.list_project_profiles(
-            domainIdentifier=domain_id,
-        )
-        result['_project_profiles'] = response['items']
-        for project_profile in response['items']:
-            project_profile['_details'] = datazone.get_project_profile(domainIdentifier=domain_id, identifier=project_profile['id'])
-            del project_profile['_details']['ResponseMetadata']
+        def environment_blueprint_configurations():
+            for environment_blueprint_configuration in paginate(datazone.list_environment_blueprint_configurations, 'items', domainIdentifier=domain_id):
+                if depth > 0:
+                    environment_blueprint_configuration['_details'] = datazone.get_environment_blueprint_configuration(domainIdentifier=domain_id, environmentBlueprintIdentifier=environment_blueprint_configuration['environmentBlueprintId'])
+                    del environment_blueprint_configuration['_details']['ResponseMetadata']
+                yield environment_blueprint_configuration
+        if 'blueprint-configurations' in sections:
+            emitter.list_section('_environment_blueprint_configurations', environment_blueprint_configurations())
 
-        result['_projects'] = list_all_projects(domain_id)
+        def project_profiles():
+            for project_profile in paginate(datazone.list_project_profiles, 'items', domainIdentifier=domain_id):
+                if depth > 0:
+                    project_profile['_details'] = datazone.get_project_profile(domainIdentifier=domain_id, identifier=project_profile['id'])
+                    del project_profile['_details']['ResponseMetadata']
+                yield project_profile
+        if 'profiles' in sections:
+            emitter.list_section('_project_profiles', project_profiles())
+
+        if 'projects' in sections:
+            emitter.list_section('_projects', iter_projects(domain_id, FULL if depth > 0 else SUMMARY))
 
         # v1 API
         # response = datazone.list_environment_profiles(
@@ -123,12 +155,26 @@ def describe(id, name):
         #    pool['_accounts'] = accounts
         #result['_pools'] = pools
             
-        click.echo(json.dumps(result, default=str, indent=4))    
+        emitter.close()
 
     except Exception as e:
         click.echo(f"❌ Error describing domain {domain_id}: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
+# a domain usually becomes available within a few minutes
+DOMAIN_TIMEOUT = 1800
+
+
+def domain_status_check(datazone, domain_id):
+    """Return a poll check which is done once the domain is AVAILABLE, a failed creation raises an error."""
+    def check():
+        domain = datazone.get_domain(identifier=domain_id)
+        if domain['status'] == 'CREATION_FAILED':
+            raise click.ClickException(f"Creation of domain {domain_id} failed.")
+        return domain['status'] == 'AVAILABLE', domain
+    return check
+
+
 @domains.command(name='create')
 @click.option('--manifest', required=True, help='Name of the file describing the domain to create')
 def create(manifest):
@@ -138,7 +184,7 @@ def create(manifest):
         sm domains create --manifest domain_config.json
     """
     try:
-        datazone = boto3.client('datazone')
+        datazone = get_client('datazone')
         
         # load the manifest
         params = json.load(open(manifest))
@@ -160,42 +206,65 @@ def create(manifest):
         
         # create the domain
         click.echo(f"Creating domain '{params['name']}'...")
+        start = time.monotonic()
         response = datazone.create_domain(**create_domain_params)
         domain_id = response['id']
+        cache.invalidate('domain', *domain_cache_key(params['name']))
         
-        # function to search a user profile by email and assign it as owner of a domain unit
-        def assign_owner(domain_id, entity_id, owner_email):
-            user = datazone.search_user_profiles(domainIdentifier=domain_id, userType='SSO_USER', searchText=owner_email)['items'][0]
+        timings = { 'create domain': time.monotonic() - start }
+
+        # wait for the domain to be available before creating its units
+        phase = time.monotonic()
+        domain = poll(domain_status_check(datazone, domain_id), f"domain '{params['name']}'", timeout=DOMAIN_TIMEOUT, initial=2, maximum=15)
+        timings['wait for domain'] = time.monotonic() - phase
+        click.echo(f"    ✅ Domain '{params['name']}' is {domain['status']}.")
+
+        # resolve every owner email once
+        phase = time.monotonic()
+        emails = [params['owner']]
+        level = params.get('domainUnits', [])
+        while level:
+            emails += [domain_unit['owner'] for domain_unit in level]
+            level = [child for domain_unit in level for child in domain_unit.get('children', [])]
+        emails = list(dict.fromkeys(emails))
+        users = dict(zip(emails, run_parallel(lambda email: find_user_id(datazone, domain_id, email), emails)))
+        timings['resolve owners'] = time.monotonic() - phase
+
+        def assign_owner(entity_id, owner_email):
             datazone.add_entity_owner(
                 domainIdentifier=domain_id, 
                 entityIdentifier=entity_id, 
                 entityType='DOMAIN_UNIT', 
-                owner={ 'user': { 'userIdentifier': user['id'] } } )
-        
-        # recursive function used to create the domain units
-        def create_domain_unit(domain_id, parent_domain_unit_id, domain_units):
-            for domain_unit in domain_units:
-                response = datazone.create_domain_unit(domainIdentifier=domain_id, parentDomainUnitIdentifier=parent_domain_unit_id, name=domain_unit['name'])
-                assign_owner(domain_id, response['id'], domain_unit['owner'])
-                if 'children' in domain_unit:
-                    create_domain_unit(domain_id, response['id'], domain_unit['children'])
-        
-        # get the root domain unit and assign its owner
-        domain = datazone.get_domain(identifier=domain_id)
+                owner={ 'user': { 'userIdentifier': users[owner_email] } } )
+
+        def create_domain_unit(item):
+            parent_domain_unit_id, domain_unit = item
+            unit = datazone.create_domain_unit(domainIdentifier=domain_id, parentDomainUnitIdentifier=parent_domain_unit_id, name=domain_unit['name'])
+            assign_owner(unit['id'], domain_unit['owner'])
+            return [(unit['id'], child) for child in domain_unit.get('children', [])]
+
+        # assign the root domain unit owner, then create the domain units level by level, the siblings in parallel
+        phase = time.monotonic()
         root_domain_unit_id = domain['rootDomainUnitId']
-        assign_owner(domain_id, root_domain_unit_id, params['owner'])
-        
-        # create the domain units
-        create_domain_unit(domain_id, root_domain_unit_id, params['domainUnits'])
+        assign_owner(root_domain_unit_id, params['owner'])
+        level = [(root_domain_unit_id, domain_unit) for domain_unit in params.get('domainUnits', [])]
+        count = 0
+        while level:
+            count += len(level)
+            level = [child for children in run_parallel(create_domain_unit, level) for child in children]
+        timings[f"domain units ({count})"] = time.monotonic() - phase
+
+        for name, elapsed in timings.items():
+            click.echo(f"    ⏱️  {name}: {elapsed:.1f}s")
                           
         # Display the domain details
-        click.echo(f"✅ Domain creation initiated for '{params['name']}' (ID: {domain_id}).")
+        click.echo(f"✅ Domain '{params['name']}' created (ID: {domain_id}).")
         click.echo(f"\nDomain Information:")
         click.echo(f"  Name: {params['name']}")
         click.echo(f"  ID: {domain_id}")
-        click.echo(f"  Status: {response.get('status', 'CREATING')}")
-        if 'portalUrl' in response:
-            click.echo(f"  Portal URL: {response['portalUrl']}")
+        click.echo(f"  Status: {domain['status']}")
+        if 'portalUrl' in domain:
+            click.echo(f"  Portal URL: {domain['portalUrl']}")
         
         return response
         
@@ -207,13 +276,17 @@ def create(manifest):
 @click.option('--id', 'domain_id', required=False, help='ID of the domain to delete')
 @click.option('--name', 'domain_name', required=False, help='The Name of the domain to delete')
 @click.option('--force', is_flag=True, help='Skip confirmation prompt')
-def delete(domain_id, domain_name, force):
+@click.option('--plan', 'dry_run', is_flag=True, help='Show the teardown plan and its estimated API calls without deleting anything')
+def delete(domain_id, domain_name, force, dry_run):
     """Delete a DataZone domain and its associated resources.
     
     This will permanently delete the domain and all its associated resources.
     Use with caution as this action cannot be undone.
+    The projects, environments, project profiles, policy grants, resource shares and domain units are discovered,
+    then deleted wave by wave, the independent deletions of a wave run concurrently.
     
     Example:
+        sm domains delete --id dzd_xxxxxxxxx --plan
         sm domains delete --id dzd_xxxxxxxxx
         sm domains delete --name my-domain --force
     """
@@ -223,17 +296,23 @@ def delete(domain_id, domain_name, force):
             click.echo("❌ Either --id or --name must be provided", err=True)
             click.get_current_context().exit(1)
 
-        datazone = boto3.client('datazone')
-        
-        # Get domain details to show user what will be deleted
-        domain = datazone.get_domain(identifier=domain_id)
+        # Discover what will be deleted
+        resources = teardown.discover(domain_id)
+        steps = teardown.build_plan(domain_id, resources)
+        domain = resources['domain']
         domain_name = domain.get('name', 'Unknown')
+        if dry_run:
+            click.echo(f"📋 Teardown plan of domain '{domain_name}' (ID: {domain_id}):")
+            teardown.print_plan(steps, resources)
+            return
+
         click.echo(f"\n⚠️  WARNING: You are about to delete the following domain:")
         click.echo(f"   Name: {domain_name}")
         click.echo(f"   ID: {domain_id}")
         click.echo(f"   Status: {domain.get('status', 'UNKNOWN')}")
         if 'portalUrl' in domain:
             click.echo(f"   Portal URL: {domain['portalUrl']}")
+        teardown.print_plan(steps, resources)
         click.echo("\nThis action will permanently delete the domain and all its resources!")
         click.echo("This operation cannot be undone!")
             
@@ -244,21 +323,16 @@ def delete(domain_id, domain_name, force):
             
         click.echo(f"\nDeleting domain '{domain_name}' (ID: {domain_id})...")
             
-        delete_project_profile('dev', domain_id)
-        delete_project_profile('test', domain_id)
-        delete_project_profile('prod', domain_id)
-        delete_resource_shares(domain_id)
-        response = datazone.delete_domain(identifier=domain_id)
+        timings = teardown.run_plan(steps)
+        for name, elapsed in timings.items():
+            click.echo(f"    ⏱️  {name}: {elapsed:.1f}s")
+        cache.invalidate('domain', *domain_cache_key(domain_name))
+        for entity in ['project', 'profile', 'blueprint-summary', 'blueprint-parameters', 'mwaa']:
+            cache.invalidate(entity, domain_id)
+        cache.delete_document(cache.document_path('users', f"{domain_id}.json"))
             
         click.echo(f"✅ Domain '{domain_name}' has been successfully deleted.")
             
-        return response
-            
     except Exception as e:
         click.echo(f"❌ Error deleting domain: {str(e)}", err=True)
         click.get_current_context().exit(1)
-
-def register_commands(cli):
-    """Register domain commands with the main CLI"""
-    cli.add_command(domains)
-
@@ -27,20 +27,28 @@ def help():
     
     click.echo("\nAccounts Commands:")
     click.echo("  accounts list            List accounts in a domain.")
-    click.echo("  accounts invite          Invite an AWS account to a domain.")
+    click.echo("  accounts invite          Invite one or several AWS accounts to a domain.")
     click.echo("  accounts uninvite        Remove an account from a domain.")
     click.echo("  accounts list-blueprints List blueprints in a domain.")
     click.echo("  accounts describe-blueprint Show details of a specific blueprint.")
+    click.echo("  accounts refresh-blueprints Refresh the cached blueprint catalog.")
     
     click.echo("\nProjects Commands:")
     click.echo("  projects list          List projects in a domain.")
     click.echo("  projects create        Create a new project in a domain.")
+    click.echo("  projects create-batch  Create several projects from a manifest.")
     click.echo("  projects describe      Get details of a specific project.")
-    click.echo("  projects delete        Delete a project from a domain.")
+    click.echo("  projects delete        Delete projects from a domain, optionally waiting for completion.")
     
     click.echo("\nWorkflow Commands:")
     click.echo("  workflows describe      Get workflow environment details for a project")
     click.echo("  workflows list-dags     List DAGs in a project's workflow environment")
+    click.echo("  workflows run-dag       Trigger a DAG and optionally wait for its completion")
+    click.echo("  workflows check-dag     Wait for a DAG run to complete")
+    click.echo("  workflows watch         Wait for several DAG runs across environments")
+    click.echo("  workflows run-batch     Trigger the DAG runs listed in a manifest")
+    click.echo("  workflows runs          Export DAG and task duration statistics")
+    click.echo("  workflows logs          Show or follow the task logs of a DAG run")
 
     click.echo("\nAsset Commands:")
     click.echo("  assets grant-access   Grant access to an S3 location")
@@ -0,0 +1,86 @@
+import json
+import click
+
+OUTPUT_FORMATS = ['json', 'ndjson']
+
+
+def _dumps(value, indent=None):
+    return json.dumps(value, default=str, indent=indent)
+
+
+class JsonEmitter:
+    """Write a JSON object section by section as soon as each section is available.
+
+    The output is identical to json.dumps(result, default=str, indent=4) on the complete object.
+    """
+
+    def __init__(self, indent=4):
+        self.indent = indent
+        self.empty = True
+
+    def _shift(self, text, level):
+        return text.replace('\n', '\n' + ' ' * (self.indent * level))
+
+    def _key(self, key):
+        click.echo('{' if self.empty else ',', nl=False)
+        click.echo(f"\n{' ' * self.indent}{_dumps(key)}: ", nl=False)
+        self.empty = False
+
+    def section(self, key, value):
+        self._key(key)
+        click.echo(self._shift(_dumps(value, self.indent), 1), nl=False)
+
+    def list_section(self, key, items):
+        """Stream the items of a list section, items is usually a generator fetching them lazily."""
+        self._key(key)
+        click.echo('[', nl=False)
+        empty = True
+        for item in items:
+            click.echo('' if empty else ',', nl=False)
+            click.echo(f"\n{' ' * self.indent * 2}{self._shift(_dumps(item, self.indent), 2)}", nl=False)
+            empty = False
+        click.echo(']' if empty else f"\n{' ' * self.indent}]", nl=False)
+
+    def tree_section(self, key, root, children_key='_children'):
+        self.section(key, root)
+
+    def close(self):
+        click.echo('{}' if self.empty else '\n}')
+
+
+class NdjsonEmitter:
+    """Write one JSON record per line and per entity, each record is tagged with the section it belongs to."""
+
+    def _record(self, key, value):
+        click.echo(_dumps({ 'section': key, 'data': value }))
+
+    def section(self, key, value):
+        self._record(key, value)
+
+    def list_section(self, key, items):
+        for item in items:
+            self._record(key, item)
+
+    def tree_section(self, key, root, children_key='_children'):
+        """Flatten a tree, each node is written without its children and with the id of its parent."""
+        nodes = [(root, None)]
+        while nodes:
+            node, parent_id = nodes.pop(0)
+            record = { k: v for k, v in node.items() if k != children_key }
+            record['_parent_id'] = parent_id
+            self._record(key, record)
+            nodes += [(child, node['_id']) for child in node.get(children_key, [])]
+
+    def close(self):
+        pass
+
+
+def print_table(rows):
+    """Print rows of strings as left aligned columns, the first row being the header."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        click.echo('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def get_emitter(output, indent=4):
+    return NdjsonEmitter() if output == 'ndjson' else JsonEmitter(indent)
@@ -0,0 +1,15 @@
+def iter_pages(operation, result_key, **kwargs):
+    """Lazily yield each page of items returned by a paginated AWS list call, following nextToken."""
+    while True:
+        response = operation(**kwargs)
+        yield response.get(result_key, [])
+        token = response.get('nextToken')
+        if not token:
+            return
+        kwargs['nextToken'] = token
+
+
+def paginate(operation, result_key, **kwargs):
+    """Lazily yield the items returned by a paginated AWS list call, pages are fetched on demand."""
+    for page in iter_pages(operation, result_key, **kwargs):
+        yield from page
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_CONCURRENCY = 8
+_concurrency = DEFAULT_CONCURRENCY
+
+
+def set_concurrency(value):
+    global _concurrency
+    _concurrency = value
+
+
+def get_concurrency():
+    return _concurrency
+
+
+class RateLimiter:
+    """Space out calls made from several threads so that at most rate calls start per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next = time.monotonic()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next - now
+            self.next = max(now, self.next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def run_parallel(fn, items):
+    """Apply fn to every item using a bounded worker pool, results are returned in the input order."""
+    items = list(items)
+    if _concurrency <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(_concurrency, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+def graph_waves(dependencies):
+    """Group the steps of a dependency graph, dependencies is { name: [dependencies] }, into waves of steps which can run in parallel."""
+    waves = []
+    done = set()
+    pending = dict(dependencies)
+    while pending:
+        ready = [name for name, names in pending.items() if all(d in done for d in names)]
+        if not ready:
+            raise ValueError(f"Circular or missing dependencies between the steps: {', '.join(pending)}")
+        waves.append(ready)
+        done.update(ready)
+        for name in ready:
+            del pending[name]
+    return waves
+
+
+def run_graph(steps):
+    """Run a dependency graph of steps, steps is { name: (fn, [dependencies]) } and fn receives the results of the previous steps.
+
+    Each step starts as soon as its own dependencies are done, not when a whole wave is. After a failure no new step
+    starts, the running ones are awaited and the first error is raised. Return the result and the duration in seconds of each step.
+    """
+    dependencies = { name: list(names) for name, (fn, names) in steps.items() }
+    graph_waves(dependencies)  # raises on circular or missing dependencies
+    results = {}
+    timings = {}
+    def run(name):
+        start = time.monotonic()
+        result = steps[name][0](results)
+        timings[name] = time.monotonic() - start
+        return result
+    waiting = { name: set(names) for name, names in dependencies.items() }
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(_concurrency, len(steps)))) as executor:
+        def start_ready():
+            for name in [name for name, names in waiting.items() if not names]:
+                del waiting[name]
+                running[executor.submit(run, name)] = name
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                for names in waiting.values():
+                    names.discard(name)
+            start_ready()
+    return { name: results[name] for name in steps }, { name: timings[name] for name in steps }
@@ -0,0 +1,107 @@
+import heapq
+import random
+import time
+import threading
+import click
+
+# (description, seconds, ready) of every wait_until, reported by the --stats option
+_timings = []
+_timings_lock = threading.Lock()
+
+
+def backoff_delays(initial=2, factor=1.5, maximum=60, jitter=0.2):
+    """Yield exponentially growing delays, capped to maximum, with a random jitter of +/- jitter percent."""
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, maximum)
+
+
+class Poller:
+    """Poll many targets from a single scheduling loop, each target with its own backoff.
+
+    A check returns a (done, value) tuple, the target is polled again after its next delay until done.
+    The loop returns as soon as every target is done, or raises when the overall deadline is exceeded.
+    """
+
+    def __init__(self, initial=2, factor=1.5, maximum=60, jitter=0.2, timeout=None):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+        self.timeout = timeout
+        self.targets = {}
+
+    def add(self, key, check):
+        self.targets[key] = check
+
+    def run(self, on_update=None):
+        """Return a dict with the last value of each target, on_update(key, value) is called after every check."""
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+        results = {}
+        delays = {}
+        # (next poll time, insertion order, key), the order breaks ties between keys which may not be comparable
+        queue = [(start, i, key) for i, key in enumerate(self.targets)]
+        heapq.heapify(queue)
+        while queue:
+            when, i, key = heapq.heappop(queue)
+            now = time.monotonic()
+            if when > now:
+                time.sleep(when - now)
+            done, value = self.targets[key]()
+            results[key] = value
+            if on_update:
+                on_update(key, value)
+            if done:
+                continue
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                pending = [key] + [k for _, _, k in sorted(queue)]
+                raise click.ClickException(f"Timed out after {self.timeout} seconds waiting for: {', '.join(str(k) for k in pending)}")
+            if key not in delays:
+                delays[key] = backoff_delays(self.initial, self.factor, self.maximum, self.jitter)
+            # the last check of a target happens at the deadline
+            when = now + next(delays[key])
+            heapq.heappush(queue, (min(when, deadline) if deadline is not None else when, i, key))
+        return results
+
+
+def guarded(check, on_error):
+    """Wrap a check so an exception ends its target with the value returned by on_error(exception), the other targets are still polled."""
+    def guarded_check():
+        try:
+            return check()
+        except Exception as e:
+            return True, on_error(e)
+    return guarded_check
+
+
+def poll(check, description, timeout=None, on_update=None, **backoff):
+    """Poll a single check until it is done, return its last value."""
+    poller = Poller(timeout=timeout, **backoff)
+    poller.add(description, check)
+    return poller.run(None if on_update is None else lambda key, value: on_update(value))[description]
+
+
+def wait_until(check, description, timeout=300, initial=1, maximum=15, **backoff):
+    """Wait for an eventually consistent state, check returns True once the state is reached.
+
+    The duration of the wait is recorded, a click.ClickException is raised after timeout seconds.
+    """
+    start = time.monotonic()
+    ready = False
+    try:
+        poll(lambda: (bool(check()), None), description, timeout=timeout, initial=initial, maximum=maximum, **backoff)
+        ready = True
+    finally:
+        elapsed = time.monotonic() - start
+        with _timings_lock:
+            _timings.append((description, elapsed, ready))
+    click.echo(f"    ✅ {description} ready after {elapsed:.1f}s")
+    return elapsed
+
+
+def get_timings():
+    with _timings_lock:
+        return list(_timings)
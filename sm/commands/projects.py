@@ -1,10 +1,17 @@
 from email.policy import default
 import click
-import boto3
+from sm.commands.clients import get_client
 import json
+import csv
+import time
+from sm.commands import cache
 from sm.commands.utils import get_domain_id
-from sm.commands.utils import list_all_projects
-from sm.commands.utils import get_profile
+from sm.commands.utils import list_all_projects, find_project, SUMMARY, ENVIRONMENTS, FULL
+from sm.commands.utils import get_profile, get_account_details, delete_projects, run_parallel, PROJECT_DELETION_TIMEOUT
+from sm.commands.output import OUTPUT_FORMATS, get_emitter, print_table
+from sm.commands.directory import find_user_id, get_directory
+from sm.commands.parallel import RateLimiter
+from sm.commands.polling import Poller, guarded
 
 @click.group()
 def projects():
@@ -23,7 +30,7 @@ def list_projects(domain_id, domain_name):
     """
     try:
         domain_id = get_domain_id(domain_name, domain_id)
-        projects = list_all_projects(domain_id)
+        projects = list_all_projects(domain_id, SUMMARY)
         for project in projects:
             click.echo(f"✅ Found project {project['name']} ({project['id']}) {project['projectStatus']}")
         
@@ -32,6 +39,30 @@ def list_projects(domain_id, domain_name):
         click.get_current_context().exit(1)
 
 
+def _json_fragment(value):
+    # strings are escaped to stay within the quotes of their placeholder, other values are written as JSON literals
+    return json.dumps(value)[1:-1] if isinstance(value, str) else json.dumps(value)
+
+
+def render_project_template(template, domain_id, domain_unit_id, name, project_profile_id, account, values=None):
+    """Replace the placeholders of a project template, values holds additional ${KEY} placeholders, and parse it."""
+    if account == 'default':
+        branch = 'main'
+    else:
+        branch = account
+    placeholders = {
+        'DOMAIN_ID': domain_id,
+        'DOMAIN_UNIT_ID': domain_unit_id,
+        'PROJECT_NAME': name,
+        'PROJECT_PROFILE_ID': project_profile_id,
+        'BRANCH_NAME': branch,
+        'ACCOUNT': account,
+    }
+    for key, value in list(placeholders.items()) + list((values or {}).items()):
+        template = template.replace('${' + key + '}', _json_fragment(value))
+    return json.loads(template)
+
+
 @projects.command(name='create')
 @click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
 @click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
@@ -46,8 +77,7 @@ def create(domain_id, domain_name, name, account, template):
         sm projects create --domain-id dzd_xxxxxxxxx --name project_name --account dev --template custom.json
     """
     try:
-        session = boto3.Session(profile_name='default')
-        datazone = session.client('datazone')
+        datazone = get_client('datazone')
 
         domain_id = get_domain_id(domain_name, domain_id)
         domain = datazone.get_domain(identifier=domain_id)
@@ -57,37 +87,25 @@ def create(domain_id, domain_name, name, account, template):
 
         with open(template, 'r') as f:
             template = f.read()
-        template = template.replace('${DOMAIN_ID}', domain_id)
-        template = template.replace('${DOMAIN_UNIT_ID}', domain_unit_id)
-        template = template.replace('${PROJECT_NAME}', name)
-        template = template.replace('${PROJECT_PROFILE_ID}', project_profile_id)
-        if account == 'default':
-            branch = 'main'
-        else:
-            branch = account
-        template = template.replace('${BRANCH_NAME}', branch)
-        template = template.replace('${ACCOUNT}', account)
-        params = json.loads(template)
+        params = render_project_template(template, domain_id, domain_unit_id, name, project_profile_id, account)
 
         owner = params['owner']
         del params['owner']
 
         project = datazone.create_project(**params)
+        cache.invalidate('project', domain_id, name)
+        cache.invalidate('mwaa', domain_id, name)
         del project['ResponseMetadata']
         #click.echo(project)
 
         # function to search a user profile by email and assign it as owner of a domain unit
         def assign_owner(domain_id, project_id, owner_email):
             click.echo(f"Assigning owner {owner_email} to project {project_id}...")
-            users = datazone.search_user_profiles(domainIdentifier=domain_id, userType='SSO_USER', searchText=owner_email)
-            if len(users['items']) == 0:
-                raise click.BadParameter(f"User {owner_email} not found in domain {domain_id}")
-            user = users['items'][0]
             datazone.create_project_membership(
                 designation='PROJECT_OWNER',
                 domainIdentifier=domain_id,
                 member={
-                    'userIdentifier': user['id']
+                    'userIdentifier': find_user_id(datazone, domain_id, owner_email)
                 },
                 projectIdentifier=project_id
             )
@@ -99,15 +117,195 @@ def create(domain_id, domain_name, name, account, template):
         click.echo(f"❌ Error creating project: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
-def get_project(domain_id, name):
-    projects = list_all_projects(domain_id)
-    project = None
-    for item in projects:
-        if item['name'] == name:
-            #click.echo(json.dumps(item, indent=2, default=str))
-            project = item
-            break
-    return project
+# environments of a new project are deployed in the background, the deployment can take tens of minutes
+DEPLOYMENT_TIMEOUT = 3600
+DEPLOYMENT_DONE_STATES = ['SUCCESSFUL', 'FAILED_VALIDATION', 'FAILED_DEPLOYMENT']
+
+
+def load_manifest_rows(manifest):
+    """Read and validate the rows of a JSON or CSV manifest, the CSV params column holds KEY=value pairs separated by ';'."""
+    with open(manifest, 'r', newline='') as f:
+        if manifest.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+            for i, row in enumerate(rows, 1):
+                pairs = [pair.split('=', 1) for pair in (row.get('params') or '').split(';') if pair.strip()]
+                if any(len(pair) != 2 for pair in pairs):
+                    raise click.BadParameter(f"Manifest row {i}: params must be KEY=value pairs separated by ';'.")
+                row['params'] = { key.strip(): value.strip() for key, value in pairs }
+        else:
+            rows = json.load(f)
+    if not isinstance(rows, list):
+        raise click.BadParameter("The manifest must be a list of rows.")
+    for i, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise click.BadParameter(f"Manifest row {i}: expected an object with name, account, template and params.")
+        for key in ['name', 'template']:
+            if not row.get(key):
+                raise click.BadParameter(f"Manifest row {i}: missing {key}.")
+        if not isinstance(row.get('params') or {}, dict):
+            raise click.BadParameter(f"Manifest row {i}: params must be an object.")
+        if row.get('owner') is not None and not isinstance(row['owner'], str):
+            raise click.BadParameter(f"Manifest row {i}: owner must be an email.")
+        row['account'] = row.get('account') or 'default'
+        row['row'] = i
+    return rows
+
+
+def deployment_check(datazone, domain_id, project_id):
+    """Return a Poller check which is done once the environments of a new project are deployed or failed."""
+    def check():
+        project = datazone.get_project(domainIdentifier=domain_id, identifier=project_id)
+        if project.get('projectStatus') == 'CREATE_FAILED':
+            return True, 'CREATE_FAILED'
+        # the deployment details may not be reported yet right after the creation
+        status = project.get('environmentDeploymentDetails', {}).get('overallDeploymentStatus', 'PENDING_DEPLOYMENT')
+        return status in DEPLOYMENT_DONE_STATES, status
+    return check
+
+
+def print_create_summary(results):
+    rows = [('NAME', 'ACCOUNT', 'PROJECT ID', 'STATUS', 'DURATION')]
+    for result in results:
+        row = result['row']
+        duration = f"{result['duration']:.0f}s" if result['duration'] is not None else '-'
+        rows.append((row['name'], row['account'], result['project_id'] or '-', result['status'], duration))
+    print_table(rows)
+    for result in results:
+        if result['error']:
+            click.echo(f"❌ Row {result['row']['row']} ({result['row']['name']}): {result['error']}", err=True)
+
+
+@projects.command(name='create-batch')
+@click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
+@click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
+@click.option('--manifest', required=True, help='JSON or CSV file listing the projects to create, each row with name, account, template and optional params')
+@click.option('--rate', type=click.FloatRange(min=0, min_open=True), default=2, show_default=True, help='Maximum number of creation calls per second')
+@click.option('--wait', is_flag=True, default=False, help='Wait for the environments of every project to be deployed')
+@click.option('--timeout', type=click.IntRange(min=1), default=DEPLOYMENT_TIMEOUT, show_default=True, help='Maximum number of seconds to wait for all the deployments')
+def create_batch(domain_id, domain_name, manifest, rate, wait, timeout):
+    """Create several projects, possibly in different accounts, and summarize the results.
+
+    The templates are rendered and the project profiles and owners resolved before any project is created,
+    the projects are then created in parallel (see the global --concurrency option) within the rate limit.
+    The params of a row replace additional ${KEY} placeholders of its template, its optional owner replaces the template owner.
+
+    Example:
+        sm projects create-batch --domain-name my-domain --manifest projects.json --wait
+
+    With projects.json:
+        [ { "name": "sales_dev", "account": "dev", "template": "templates/project-template.json", "params": { "REPO": "MYORG/sales" } },
+          { "name": "sales_prod", "account": "prod", "template": "templates/project-template.json" } ]
+
+    Or projects.csv:
+        name,account,template,params
+        sales_dev,dev,templates/project-template.json,REPO=MYORG/sales
+    """
+    try:
+        datazone = get_client('datazone')
+        domain_id = get_domain_id(domain_name, domain_id)
+        rows = load_manifest_rows(manifest)
+        domain_unit_id = datazone.get_domain(identifier=domain_id)['rootDomainUnitId']
+
+        # each template, project profile and owner is resolved once, a row which cannot be resolved is reported and skipped
+        templates = {}
+        def read_template(path):
+            if path not in templates:
+                with open(path, 'r') as f:
+                    templates[path] = f.read()
+            return templates[path]
+        def find_profile(account):
+            try:
+                return get_profile(domain_id, f'Custom_{account}')
+            except click.ClickException as e:
+                return e
+        accounts = list(dict.fromkeys(row['account'] for row in rows))
+        profiles = dict(zip(accounts, run_parallel(find_profile, accounts)))
+
+        results = []
+        for row in rows:
+            result = { 'row': row, 'params': None, 'project_id': None, 'status': 'error', 'error': None, 'duration': None, 'started': None }
+            try:
+                if isinstance(profiles[row['account']], Exception):
+                    raise profiles[row['account']]
+                params = render_project_template(read_template(row['template']), domain_id, domain_unit_id, row['name'], profiles[row['account']], row['account'], row.get('params'))
+                if row.get('owner'):
+                    params['owner'] = row['owner']
+                if not params.get('owner'):
+                    raise click.BadParameter(f"No owner in the manifest row nor in the template {row['template']}.")
+                result['params'] = params
+            except Exception as e:
+                result['error'] = str(e)
+            results.append(result)
+        owners = list(dict.fromkeys(result['params']['owner'] for result in results if result['params']))
+        directory = get_directory(datazone, domain_id)
+        def find_owner(email):
+            try:
+                return directory.find_by_email(email)['id']
+            except click.ClickException:
+                return None
+        owner_ids = dict(zip(owners, run_parallel(find_owner, owners)))
+        directory.save()
+
+        limiter = RateLimiter(rate)
+        def create_one(result):
+            if result['error']:
+                return
+            params = dict(result['params'])
+            owner = params.pop('owner')
+            try:
+                if not owner_ids[owner]:
+                    raise click.BadParameter(f"User {owner} not found in domain {domain_id}")
+                limiter.acquire()
+                result['started'] = time.monotonic()
+                project = datazone.create_project(**params)
+                result['project_id'] = project['id']
+                cache.invalidate('project', domain_id, params['name'])
+                cache.invalidate('mwaa', domain_id, params['name'])
+                limiter.acquire()
+                datazone.create_project_membership(designation='PROJECT_OWNER', domainIdentifier=domain_id, member={ 'userIdentifier': owner_ids[owner] }, projectIdentifier=project['id'])
+                result['status'] = 'CREATED'
+                click.echo(f"✅ Project {params['name']} created with ID: {project['id']}")
+            except Exception as e:
+                result['error'] = str(e)
+        run_parallel(create_one, results)
+
+        if wait:
+            # a project whose status cannot be read ends in the error status, the project itself exists
+            def on_error(i):
+                def record(e):
+                    results[i]['error'] = f"Environment deployment status not available: {e}"
+                    return 'error'
+                return record
+            poller = Poller(initial=5, maximum=30, timeout=timeout)
+            for i, result in enumerate(results):
+                if result['status'] == 'CREATED':
+                    poller.add(i, guarded(deployment_check(datazone, domain_id, result['project_id']), on_error(i)))
+            def on_update(i, status):
+                result = results[i]
+                result['status'] = status
+                if status in DEPLOYMENT_DONE_STATES + ['CREATE_FAILED', 'error']:
+                    result['duration'] = time.monotonic() - result['started']
+                    if status != 'SUCCESSFUL' and not result['error']:
+                        result['error'] = f"Environment deployment ended with {status}"
+            try:
+                poller.run(on_update)
+            except click.ClickException:
+                # the summary still reports the last known status of every project
+                for result in results:
+                    if result['project_id'] and result['duration'] is None and not result['error']:
+                        result['error'] = f"Environment deployment not finished after {timeout} seconds"
+
+        print_create_summary(results)
+        failed = [result for result in results if result['error']]
+        if failed:
+            raise click.ClickException(f"{len(failed)} of {len(results)} projects failed.")
+    except Exception as e:
+        click.echo(f"❌ Error creating projects: {str(e)}", err=True)
+        click.get_current_context().exit(1)
+
+
+def get_project(domain_id, name, level=FULL):
+    return find_project(domain_id, name, level)
 
 @projects.command(name='describe-workflow-env')
 @click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
@@ -124,7 +322,7 @@ def describe_workflow_env(domain_id, domain_name, name):
     """
     try:
         domain_id = get_domain_id(domain_name, domain_id)        
-        project = get_project(domain_id, name)
+        project = get_project(domain_id, name, ENVIRONMENTS)
         if not project:
             raise click.BadParameter(f"Project '{name}' not found in domain '{domain_id}'.")
         environments = project['_environments']
@@ -146,7 +344,8 @@ def describe_workflow_env(domain_id, domain_name, name):
 @click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
 @click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
 @click.option('--name', required=True, help='The name of the project to retrieve')
-def describe(domain_id, domain_name, name):
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='json', show_default=True, help='json writes one document, ndjson writes one record per entity')
+def describe(domain_id, domain_name, name, output):
     """Get details of a specific project as JSON.
     
     The output is formatted as pretty-printed JSON by default.
@@ -160,53 +359,142 @@ def describe(domain_id, domain_name, name):
         project = get_project(domain_id, name)
         if not project:
             raise click.BadParameter(f"Project '{name}' not found in domain '{domain_id}'.")        
-        click.echo(json.dumps(project, indent=2, default=str))
-            
+        emitter = get_emitter(output, indent=2)
+        environments = project.pop('_environments')
+        memberships = project.pop('_project_memberships')
+        if output == 'ndjson':
+            emitter.section('_project', project)
+        else:
+            # the json document is the project itself, its fields are written one by one
+            for key, value in project.items():
+                emitter.section(key, value)
+        emitter.list_section('_environments', environments)
+        emitter.list_section('_project_memberships', memberships)
+        emitter.close()
+
     except Exception as e:
         click.echo(f"❌ Error getting project details: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
 
+# batch_delete_table accepts up to 100 tables per call
+GLUE_BATCH = 100
+# provisioned resources of the environments holding the name of a Glue database
+GLUE_DATABASE_RESOURCES = ['glueDBName', 'glueProducerDBName', 'glueConsumerDBName']
+
+
+def get_glue_databases(project):
+    """Return the Glue databases provisioned by the environments of a project loaded with the ENVIRONMENTS level, with their account and region."""
+    databases = []
+    for environment in project.get('_environments', []):
+        details = environment.get('_details', {})
+        for rsc in details.get('provisionedResources', []):
+            if rsc.get('name') in GLUE_DATABASE_RESOURCES and rsc.get('value'):
+                database = { 'name': rsc['value'], 'account_id': details.get('awsAccountId'), 'region': details.get('awsAccountRegion') }
+                if database not in databases:
+                    databases.append(database)
+    return databases
+
+
+def drop_glue_databases(glue, databases):
+    """Drop Glue databases and their tables, the tables are deleted concurrently in batches. Return the databases actually dropped."""
+    def list_tables(database):
+        try:
+            return [t['Name'] for page in glue.get_paginator('get_tables').paginate(DatabaseName=database) for t in page['TableList']]
+        except glue.exceptions.EntityNotFoundException:
+            return []
+    tables = run_parallel(list_tables, databases)
+
+    def delete_tables(batch):
+        database, names = batch
+        try:
+            errors = glue.batch_delete_table(DatabaseName=database, TablesToDelete=names).get('Errors', [])
+        except glue.exceptions.EntityNotFoundException:
+            return
+        errors = [error for error in errors if error['ErrorDetail'].get('ErrorCode') != 'EntityNotFoundException']
+        if errors:
+            raise click.ClickException(f"Cannot delete table {errors[0]['TableName']} of Glue database {database}: {errors[0]['ErrorDetail'].get('ErrorMessage')}")
+    batches = [(database, names[i:i + GLUE_BATCH]) for database, names in zip(databases, tables) for i in range(0, len(names), GLUE_BATCH)]
+    run_parallel(delete_tables, batches)
+
+    def delete_database(database):
+        try:
+            glue.delete_database(Name=database)
+        except glue.exceptions.EntityNotFoundException:
+            return False
+        click.echo(f"    ✅ Dropped Glue database {database}.")
+        return True
+    return [database for database, dropped in zip(databases, run_parallel(delete_database, databases)) if dropped]
+
+
 @projects.command(name='delete')
 @click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
 @click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
-@click.option('--name', required=True, help='The name of the project')
+@click.option('--name', 'names', required=True, multiple=True, help='The name of the project, repeat the option to delete several projects')
+@click.option('--account', 'accounts', multiple=True, help='AWS account profile name hosting Glue databases of the projects, repeat the option for several accounts')
+@click.option('--wait', is_flag=True, default=False, help='Wait for the projects and their environments to be deleted, then drop their Glue databases')
+@click.option('--timeout', type=click.IntRange(min=1), default=PROJECT_DELETION_TIMEOUT, show_default=True, help='Maximum number of seconds to wait')
 @click.option('--force', is_flag=True, default=False, help='Skip confirmation prompt')
-def delete(domain_id, domain_name, name, force):
-    """Delete a project in the specified domain.
+def delete(domain_id, domain_name, names, accounts, wait, timeout, force):
+    """Delete projects in the specified domain, and drop their Glue databases.
+
+    The Glue databases are dropped once the environments are deleted, so only with --wait, from the account
+    of their environment. Pass the profile of each of these accounts with --account.
     
     Example:
         sm projects delete --domain-name my-domain --name project_name
         sm projects delete --domain-id dzd_xxxxxxxxx --name project_name --force
+        sm projects delete --domain-name my-domain --name project_a --name project_b --account dev --wait --force
     """
     try:
-        session = boto3.Session(profile_name='default')
-        datazone = session.client('datazone')
+        datazone = get_client('datazone')
         domain_id = get_domain_id(domain_name, domain_id)
-        project_id = get_project(domain_id, name)
+        names = list(dict.fromkeys(names))
+        projects = run_parallel(lambda name: find_project(domain_id, name, ENVIRONMENTS), names)
+        missing = [name for name, project in zip(names, projects) if not project]
+        if missing:
+            raise click.BadParameter(f"Project(s) {', '.join(missing)} not found in domain '{domain_id}'.")
+        databases = [database for project in projects for database in get_glue_databases(project)]
+        # profile of each account hosting a Glue database
+        profiles = dict(zip(run_parallel(lambda account: get_account_details(account)['Account'], accounts), accounts))
 
-        click.echo(f"\n⚠️  WARNING: You are about to delete the following project:")
-        click.echo(f"   Name: {name}")
-        click.echo(f"   ID: {project_id}")
-        click.echo("\nThis action will permanently delete the project and all its resources!")
+        click.echo(f"\n⚠️  WARNING: You are about to delete the following project(s):")
+        for project in projects:
+            click.echo(f"   Name: {project['name']}")
+            click.echo(f"   ID: {project['id']}")
+        for database in databases:
+            click.echo(f"   Glue database: {database['name']} (account {database['account_id']})")
+        click.echo("\nThis action will permanently delete the project(s) and all their resources!")
         click.echo("This operation cannot be undone!")
             
         if not force:
-            if not click.confirm("\nAre you sure you want to delete this project?", default=False):
+            if not click.confirm("\nAre you sure you want to delete these projects?", default=False):
                 click.echo("Deletion canceled!")
                 return
             
-        click.echo(f"\nDeleting project '{name}' (ID: {project_id})...")
+        click.echo(f"\nDeleting {len(projects)} project(s)...")
+        delete_projects(datazone, domain_id, projects, wait=wait, timeout=timeout)
 
-        datazone.delete_project(domainIdentifier=domain_id, identifier=project_id, skipDeletionCheck=True)
+        if not wait:
+            if databases:
+                click.echo(f"⚠️  The Glue databases are not dropped, use --wait to drop them once the environments are deleted.")
+            click.echo(f"✅ Deletion of project(s) {', '.join(names)} started, use --wait to wait for its completion.")
+            return
 
-        click.echo(f"✅ Project {name} deleted successfully!")
+        # the environments are deleted, drop their Glue databases from the account of each environment
+        skipped = [database for database in databases if database['account_id'] not in profiles]
+        for database in skipped:
+            click.echo(f"⚠️  Glue database {database['name']} not dropped, pass --account with the profile of account {database['account_id']}.")
+        groups = {}
+        for database in databases:
+            if database['account_id'] in profiles:
+                groups.setdefault((profiles[database['account_id']], database['region']), []).append(database['name'])
+        dropped = [name for (account, region), names_in_account in groups.items() for name in drop_glue_databases(get_client('glue', account, region), names_in_account)]
+
+        click.echo(f"✅ Project(s) {', '.join(names)} deleted successfully, {len(dropped)} Glue database(s) dropped!")
+        if skipped:
+            raise click.ClickException(f"{len(skipped)} Glue database(s) left behind.")
                
     except Exception as e:
         click.echo(f"❌ Error deleting project: {str(e)}", err=True)
         click.get_current_context().exit(1)
-
-
-def register_commands(cli):
-    """Register project commands with the main CLI"""
-    cli.add_command(projects)
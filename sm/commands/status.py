@@ -1,5 +1,5 @@
 import click
-import boto3
+from sm.commands.clients import get_client, DEFAULT_PROFILE
 import os
 
 @click.command()
@@ -8,11 +8,7 @@ def status(account):
     """Check AWS connection status."""
     try:
         click.echo("Checking AWS connection status...")
-        if not account:
-            sts = boto3.client('sts')
-        else:
-            session = boto3.Session(profile_name=account)
-            sts = session.client('sts')
+        sts = get_client('sts', account or DEFAULT_PROFILE)
         identity = sts.get_caller_identity()
         click.echo("✅ Successfully connected to AWS")
         click.echo(f"Account: {identity['Account']}")
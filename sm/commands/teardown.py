@@ -0,0 +1,147 @@
+import click
+from sm.commands.clients import get_client
+from sm.commands.utils import paginate, run_parallel, get_resource_shares, delete_projects
+from sm.commands.parallel import graph_waves, run_graph
+
+PROFILE_POLICY = 'CREATE_PROJECT_FROM_PROJECT_PROFILE'
+BLUEPRINT_POLICY = 'CREATE_ENVIRONMENT_FROM_BLUEPRINT'
+
+
+def discover(domain_id):
+    """Discover the resources attached to a domain, the independent listings run in parallel."""
+    datazone = get_client('datazone')
+    domain = datazone.get_domain(identifier=domain_id)
+
+    def list_units():
+        # non root domain units, level by level from the root, the units of a level are listed in parallel
+        levels = []
+        level = [domain['rootDomainUnitId']]
+        while level:
+            children = run_parallel(lambda unit_id: list(paginate(datazone.list_domain_units_for_parent, 'items', domainIdentifier=domain_id, parentDomainUnitIdentifier=unit_id)), level)
+            level_units = [child for units in children for child in units]
+            if level_units:
+                levels.append(level_units)
+            level = [unit['id'] for unit in level_units]
+        return levels
+
+    listings = {
+        'projects': lambda: list(paginate(datazone.list_projects, 'items', domainIdentifier=domain_id)),
+        'profiles': lambda: list(paginate(datazone.list_project_profiles, 'items', domainIdentifier=domain_id)),
+        'units': list_units,
+        'shares': lambda: get_resource_shares(domain_id),
+        # blueprint configurations of the governance account, those of the invited accounts need their credentials
+        'configurations': lambda: list(paginate(datazone.list_environment_blueprint_configurations, 'items', domainIdentifier=domain_id)),
+    }
+    resources = dict(zip(listings, run_parallel(lambda name: listings[name](), listings)))
+
+    def list_environments(project):
+        project['_environments'] = list(paginate(datazone.list_environments, 'items', domainIdentifier=domain_id, projectIdentifier=project['id']))
+
+    def list_grants(unit_id):
+        grants = paginate(datazone.list_policy_grants, 'grantList', domainIdentifier=domain_id, entityType='DOMAIN_UNIT', entityIdentifier=unit_id, policyType=PROFILE_POLICY)
+        return [{ 'unit_id': unit_id, 'principal': grant['principal'] } for grant in grants]
+
+    def list_blueprint_grants(configuration):
+        entity_id = f"{configuration['awsAccountId']}:{configuration['environmentBlueprintId']}"
+        grants = paginate(datazone.list_policy_grants, 'grantList', domainIdentifier=domain_id, entityType='ENVIRONMENT_BLUEPRINT_CONFIGURATION', entityIdentifier=entity_id, policyType=BLUEPRINT_POLICY)
+        return [{ 'entity_id': entity_id, 'principal': grant['principal'] } for grant in grants]
+
+    # second level listings are flattened in a single pool
+    unit_ids = [domain['rootDomainUnitId']] + [unit['id'] for level in resources['units'] for unit in level]
+    tasks = [(list_environments, project) for project in resources['projects']]
+    tasks += [(list_grants, unit_id) for unit_id in unit_ids]
+    tasks += [(list_blueprint_grants, configuration) for configuration in resources['configurations']]
+    results = run_parallel(lambda task: task[0](task[1]), tasks)
+    grants = results[len(resources['projects']):]
+    resources['grants'] = [grant for unit_grants in grants[:len(unit_ids)] for grant in unit_grants]
+    resources['blueprint_grants'] = [grant for configuration_grants in grants[len(unit_ids):] for grant in configuration_grants]
+    resources['domain'] = domain
+    return resources
+
+
+def build_plan(domain_id, resources):
+    """Return the teardown steps { name: (description, estimated api calls, [dependencies], fn) }.
+
+    Projects are deleted with their environments and waited for, the profiles, blueprint configurations, domain units
+    and resource shares can only go once no project uses them. The domain units are deleted from the leaves to the root.
+    """
+    datazone = get_client('datazone')
+    projects = resources['projects']
+    environments = sum(len(project['_environments']) for project in projects)
+    grants = resources['grants']
+    blueprint_grants = resources['blueprint_grants']
+    configurations = resources['configurations']
+    profiles = resources['profiles']
+    shares = resources['shares']
+    ram = get_client('ram')
+
+    def remove_grant(grant):
+        datazone.remove_policy_grant(domainIdentifier=domain_id, entityType='DOMAIN_UNIT', entityIdentifier=grant['unit_id'], policyType=PROFILE_POLICY, principal=grant['principal'])
+
+    def remove_blueprint_grant(grant):
+        datazone.remove_policy_grant(domainIdentifier=domain_id, entityType='ENVIRONMENT_BLUEPRINT_CONFIGURATION', entityIdentifier=grant['entity_id'], policyType=BLUEPRINT_POLICY, principal=grant['principal'])
+
+    def delete_configuration(configuration):
+        datazone.delete_environment_blueprint_configuration(domainIdentifier=domain_id, environmentBlueprintIdentifier=configuration['environmentBlueprintId'])
+        click.echo(f"    ✅ Deleted blueprint configuration {configuration['environmentBlueprintId']} in the domain {domain_id}.")
+
+    def delete_profile(profile):
+        datazone.delete_project_profile(domainIdentifier=domain_id, identifier=profile['id'])
+        click.echo(f"    ✅ Deleted project profile {profile['name']} in the domain {domain_id}.")
+
+    def delete_unit(unit):
+        datazone.delete_domain_unit(domainIdentifier=domain_id, identifier=unit['id'])
+        click.echo(f"    ✅ Deleted domain unit {unit['name']} in the domain {domain_id}.")
+
+    def delete_share(share):
+        ram.delete_resource_share(resourceShareArn=share['arn'])
+        click.echo(f"    ✅ Deleted resource share {share['arn']}.")
+
+    steps = {
+        # a deletion and at least one status check per project and environment
+        'projects': (f"{len(projects)} projects, {environments} environments", 2 * len(projects) + environments, [],
+                     lambda r: delete_projects(datazone, domain_id, projects)),
+        'policy-grants': (f"{len(grants)} project profile grants", len(grants), [],
+                          lambda r: run_parallel(remove_grant, grants)),
+        'profiles': (f"{len(profiles)} project profiles", len(profiles), ['projects', 'policy-grants'],
+                     lambda r: run_parallel(delete_profile, profiles)),
+        'blueprint-grants': (f"{len(blueprint_grants)} blueprint grants", len(blueprint_grants), ['projects'],
+                             lambda r: run_parallel(remove_blueprint_grant, blueprint_grants)),
+        'blueprint-configurations': (f"{len(configurations)} blueprint configurations", len(configurations), ['blueprint-grants'],
+                                     lambda r: run_parallel(delete_configuration, configurations)),
+    }
+    units = []
+    previous = ['projects', 'policy-grants']
+    for depth, level in reversed(list(enumerate(resources['units'], 1))):
+        name = f"domain-units-{depth}"
+        steps[name] = (f"{len(level)} domain units at depth {depth}", len(level), previous,
+                       lambda r, level=level: run_parallel(delete_unit, level))
+        previous = [name]
+        units.append(name)
+    steps['resource-shares'] = (f"{len(shares)} resource shares", len(shares), ['projects'],
+                                lambda r: run_parallel(delete_share, shares))
+    steps['domain'] = (f"domain {resources['domain']['name']}", 1, ['profiles', 'blueprint-configurations', 'resource-shares'] + units[-1:],
+                       lambda r: datazone.delete_domain(identifier=domain_id))
+    return steps
+
+
+def print_plan(steps, resources):
+    # the waves only group the steps for display, each step starts as soon as its own dependencies are done
+    waves = graph_waves({ name: dependencies for name, (_, _, dependencies, _) in steps.items() })
+    width = max(len(name) for name in steps)
+    for i, wave in enumerate(waves, 1):
+        click.echo(f"  Wave {i}:")
+        for name in wave:
+            description, calls, dependencies, _ = steps[name]
+            after = f", after {', '.join(dependencies)}" if dependencies else ''
+            click.echo(f"    {name:<{width}} {description} (~{calls} API calls{after})")
+    click.echo(f"  Estimated API calls: {sum(calls for _, calls, _, _ in steps.values())}")
+    invited = sorted({ share['account_id'] for share in resources['shares'] if share['account_id'] })
+    if invited:
+        click.echo(f"  Not included: the blueprint configurations and their grants in the invited accounts {', '.join(invited)}, they need the credentials of these accounts.")
+
+
+def run_plan(steps):
+    """Run the teardown steps, each step starts once its own dependencies are done, return the duration of each step."""
+    _, timings = run_graph({ name: (fn, dependencies) for name, (_, _, dependencies, fn) in steps.items() })
+    return timings
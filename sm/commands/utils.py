@@ -1,138 +1,245 @@
-import boto3
+from sm.commands.clients import get_client, DEFAULT_PROFILE, DEFAULT_REGION
 import click
+import os
+from sm.commands import cache
+from sm.commands.parallel import run_parallel, set_concurrency, get_concurrency
+from sm.commands.polling import Poller
+from sm.commands.directory import get_directory
+from sm.commands.pagination import iter_pages, paginate
+
+
+def domain_cache_key(domain_name):
+    """Cache key of a domain name, a name is only unique for the credentials and region of the governance account."""
+    credentials = os.path.abspath(os.path.expanduser(os.environ.get('AWS_SHARED_CREDENTIALS_FILE', '~/.aws/credentials')))
+    return (credentials, DEFAULT_PROFILE, DEFAULT_REGION, domain_name)
 
 
 def get_domain_id(domain_name, domain_id) -> str:
     if domain_name and not domain_id:
-        datazone = boto3.client('datazone')
-        domains = datazone.list_domains()['items']
-        for domain in domains:
+        domain_id = cache.get('domain', *domain_cache_key(domain_name))
+        if domain_id:
+            return domain_id
+        datazone = get_client('datazone')
+        for domain in paginate(datazone.list_domains, 'items'):
             if domain['name'] == domain_name:
                 domain_id = domain['id']
                 break
         if not domain_id:
             raise click.ClickException(f"Domain '{domain_name}' not found.")
+        cache.put('domain', domain_id, *domain_cache_key(domain_name))
     if not domain_id:
         raise click.ClickException("Please provide either --domain-id or --domain-name")
     return domain_id
 
 
 def get_account_details(account):
-    session = boto3.Session(profile_name=account)
-    sts = session.client('sts')
+    sts = get_client('sts', account)
     identity = sts.get_caller_identity()
     return identity
 
 
+# number of resource share arns resolved by a single get_resource_share_associations call
+RESOURCE_SHARE_BATCH = 100
+
+
 def get_resource_shares(domain_id):
     """Get the resource shares for a specific DataZone domain."""
-    result = []
-    ram = boto3.client('ram')
-    shares = ram.get_resource_shares(resourceOwner='SELF')['resourceShares']
-    for share in shares:
-        if share['name'].startswith(f"DataZone-EXTENDED_ACCESS-{domain_id}-ORG-ONLY"):
-            #click.echo(f"✅ Found resource share for {share}")
-            status = share['status']
-            if status != 'DELETED':
-                arn = share['resourceShareArn']
-                details = ram.get_resource_share_associations(resourceShareArns=[arn], associationType='PRINCIPAL')
-                account_id = details['resourceShareAssociations'][0]['associatedEntity']
-                result.append({ 'account_id': account_id, 'arn': arn, 'status': status })
-    return result
+    ram = get_client('ram')
+    name = f"DataZone-EXTENDED_ACCESS-{domain_id}-ORG-ONLY"
+    shares = [
+        share for share in paginate(ram.get_resource_shares, 'resourceShares', resourceOwner='SELF', name=name)
+        if share['name'].startswith(name) and share['status'] != 'DELETED'
+    ]
+    # the invited account of each share, the associations of a batch of shares are resolved in a single paginated call
+    accounts = {}
+    arns = [share['resourceShareArn'] for share in shares]
+    for i in range(0, len(arns), RESOURCE_SHARE_BATCH):
+        for association in paginate(ram.get_resource_share_associations, 'resourceShareAssociations', associationType='PRINCIPAL', resourceShareArns=arns[i:i + RESOURCE_SHARE_BATCH]):
+            accounts.setdefault(association['resourceShareArn'], association['associatedEntity'])
+    return [
+        { 'account_id': accounts.get(share['resourceShareArn']), 'arn': share['resourceShareArn'], 'status': share['status'] }
+        for share in shares
+    ]
     
 
 def delete_resource_shares(domain_id, account_id = None):
-    ram = boto3.client('ram')
-    shares = get_resource_shares(domain_id)
-    for share in shares:
-        to_delete = True
-        if account_id != None and share['account_id'] != account_id:
-            to_delete = False
-        if to_delete:
-            ram.delete_resource_share(resourceShareArn=share['arn'])
-            click.echo(f"    ✅ Deleted resource share {share['arn']}.")
+    ram = get_client('ram')
+    shares = [share for share in get_resource_shares(domain_id) if account_id == None or share['account_id'] == account_id]
+    def delete_share(share):
+        ram.delete_resource_share(resourceShareArn=share['arn'])
+        click.echo(f"    ✅ Deleted resource share {share['arn']}.")
+    run_parallel(delete_share, shares)
+
+
+# a project deletion can take up to 5 minutes
+PROJECT_DELETION_TIMEOUT = 900
+
+
+def get_profile_projects(datazone, domain_id):
+    """Index the projects of a domain by project profile id, the project details are loaded in parallel."""
+    projects = list(paginate(datazone.list_projects, 'items', domainIdentifier=domain_id))
+    details = run_parallel(lambda project: datazone.get_project(domainIdentifier=domain_id, identifier=project['id']), projects)
+    index = {}
+    for project, detail in zip(projects, details):
+        index.setdefault(detail.get('projectProfileId'), []).append(project)
+    return index
+
+
+def project_deletion_check(datazone, domain_id, project):
+    """Return a Poller check which is done once the project is gone, a failed deletion raises an error."""
+    def check():
+        try:
+            status = datazone.get_project(domainIdentifier=domain_id, identifier=project['id'])['projectStatus']
+        except datazone.exceptions.ResourceNotFoundException:
+            return True, 'DELETED'
+        if status == 'DELETE_FAILED':
+            raise click.ClickException(f"Deletion of project {project['name']} failed.")
+        return False, status
+    return check
+
+
+def environment_deletion_check(datazone, domain_id, environment):
+    """Return a Poller check which is done once the environment is deleted, a failed deletion raises an error."""
+    def check():
+        try:
+            status = datazone.get_environment(domainIdentifier=domain_id, identifier=environment['id'])['status']
+        except datazone.exceptions.ResourceNotFoundException:
+            return True, 'DELETED'
+        if status == 'DELETE_FAILED':
+            raise click.ClickException(f"Deletion of environment {environment['name']} failed.")
+        return status == 'DELETED', status
+    return check
+
+
+def delete_projects(datazone, domain_id, projects, wait=True, timeout=PROJECT_DELETION_TIMEOUT):
+    """Delete projects concurrently, and wait for all of them and their loaded environments to be gone."""
+    def delete_one(project):
+        datazone.delete_project(domainIdentifier=domain_id, identifier=project['id'], skipDeletionCheck=True)
+        cache.invalidate('project', domain_id, project['name'])
+        cache.invalidate('mwaa', domain_id, project['name'])
+        click.echo(f"    ✅ Deletion of project {project['name']} started in the domain {domain_id}.")
+    run_parallel(delete_one, projects)
+    if not wait or not projects:
+        return
+    poller = Poller(initial=2, maximum=15, timeout=timeout)
+    for project in projects:
+        for environment in project.get('_environments', []):
+            poller.add(f"{project['name']}/{environment['name']}", environment_deletion_check(datazone, domain_id, environment))
+        poller.add(project['name'], project_deletion_check(datazone, domain_id, project))
+    def on_update(name, status):
+        if status == 'DELETED':
+            kind = 'environment' if '/' in name else 'project'
+            click.echo(f"    ✅ Deleted {kind} {name} in the domain {domain_id}.")
+    poller.run(on_update)
 
 
 def delete_project_profile(account, domain_id):
-    datazone = boto3.client('datazone')
-    profiles = datazone.list_project_profiles(domainIdentifier=domain_id, name=f'Custom_{account}')['items']
-    #click.echo(profiles)
-    found = False
-    for p in profiles:
-        if p['name'] == f'Custom_{account}':
-            found = True
-            projects = datazone.list_projects(domainIdentifier=domain_id)['items']
-            for project in projects:
-                project_detail = datazone.get_project(domainIdentifier=domain_id, identifier=project['id'])
-                #click.echo(project_detail)
-                #click.echo(project)
-                if project_detail['projectProfileId'] == p['id']:
-                    datazone.delete_project(domainIdentifier=domain_id, identifier=project['id'], skipDeletionCheck=True)
-                    click.echo(f"    ✅ Deleted project {project['name']} in the domain {domain_id}.")
-            datazone.delete_project_profile(domainIdentifier=domain_id, identifier=p['id'])
-            click.echo(f"    ✅ Deleted project profile {p['name']} in the domain {domain_id}.")
-    if not found:
+    """Delete the project profile of an account, its projects are deleted first."""
+    datazone = get_client('datazone')
+    profiles = [p for p in paginate(datazone.list_project_profiles, 'items', domainIdentifier=domain_id, name=f'Custom_{account}') if p['name'] == f'Custom_{account}']
+    if not profiles:
         click.echo(f"    ✅ Project profile not found in the domain {domain_id} and account {account}.")
-
-def get_project(domain_id, project_id):
-    datazone = boto3.client('datazone')
-    result = datazone.get_project(domainIdentifier=domain_id, identifier=project_id)
-    del result['ResponseMetadata']
-
-    response = datazone.list_environments(
-        domainIdentifier=domain_id,
-        projectIdentifier=project_id,
-    )
-    result['_environments'] = response['items']
-    for environment in result['_environments']:
-        environment['_details'] = datazone.get_environment(domainIdentifier=domain_id, identifier=environment['id'])
-        del environment['_details']['ResponseMetadata']
-
-    response = datazone.list_project_memberships(
-        domainIdentifier=domain_id,
-        projectIdentifier=project_id,
-    )
-    result['_project_memberships'] = response['members']
-    for user in result['_project_memberships']:
-        user_id = user['memberDetails']['user']
-        user_details = datazone.get_user_profile(domainIdentifier=domain_id, userIdentifier=user_id['userId'], type='SSO')['details']
-        user_id['_user_details'] = user_details
+        return
+    index = get_profile_projects(datazone, domain_id)
+    for p in profiles:
+        # the profile cannot be deleted while its projects are still being deleted
+        delete_projects(datazone, domain_id, index.get(p['id'], []))
+        datazone.delete_project_profile(domainIdentifier=domain_id, identifier=p['id'])
+        cache.invalidate('profile', domain_id, p['name'])
+        click.echo(f"    ✅ Deleted project profile {p['name']} in the domain {domain_id}.")
+
+# enrichment levels, each level includes the previous ones
+SUMMARY = 'summary'            # list_projects items only
+ENVIRONMENTS = 'environments'  # + project details, environments and environment details
+FULL = 'full'                  # + project memberships and user profiles
+ENRICHMENT_LEVELS = [SUMMARY, ENVIRONMENTS, FULL]
+
+def get_project(domain_id, project_id, level=FULL):
+    datazone = get_client('datazone')
+    project = { 'id': project_id }
+    enrich_projects(datazone, domain_id, [project], level)
+    result = project['_details']
+    result['_environments'] = project['_environments']
+    if level == FULL:
+        result['_project_memberships'] = project['_project_memberships']
     return result
 
-def list_all_projects(domain_id):
-    datazone = boto3.client('datazone')
-    response = datazone.list_projects(
-        domainIdentifier=domain_id,
-    )
-    result = response['items']
-    for project in response['items']:
+def enrich_projects(datazone, domain_id, projects, level=FULL):
+    """Add details, environments and memberships to a list of project summaries, in parallel."""
+    if level not in ENRICHMENT_LEVELS:
+        raise click.BadParameter(f"Unknown enrichment level '{level}', expected one of {ENRICHMENT_LEVELS}.")
+    if level == SUMMARY:
+        return projects
+
+    def load_project(project):
         project['_details'] = datazone.get_project(domainIdentifier=domain_id, identifier=project['id'])
         del project['_details']['ResponseMetadata']
+        project['_environments'] = list(paginate(datazone.list_environments, 'items', domainIdentifier=domain_id, projectIdentifier=project['id']))
+        if level == FULL:
+            project['_project_memberships'] = list(paginate(datazone.list_project_memberships, 'members', domainIdentifier=domain_id, projectIdentifier=project['id']))
+    run_parallel(load_project, projects)
 
-        response = datazone.list_environments(
-            domainIdentifier=domain_id,
-            projectIdentifier=project['id'],
-        )
-        project['_environments'] = response['items']
-        for environment in project['_environments']:
-            environment['_details'] = datazone.get_environment(domainIdentifier=domain_id, identifier=environment['id'])
-            del environment['_details']['ResponseMetadata']
-
-        response = datazone.list_project_memberships(
-            domainIdentifier=domain_id,
-            projectIdentifier=project['id'],
-        )
-        project['_project_memberships'] = response['members']
-        for user in project['_project_memberships']:
-            user_id = user['memberDetails']['user']
-            user_details = datazone.get_user_profile(domainIdentifier=domain_id, userIdentifier=user_id['userId'], type='SSO')['details']
-            user_id['_user_details'] = user_details
-    return result
+    def load_environment(environment):
+        environment['_details'] = datazone.get_environment(domainIdentifier=domain_id, identifier=environment['id'])
+        del environment['_details']['ResponseMetadata']
+
+    # each member is looked up once in the user directory of the domain
+    directory = get_directory(datazone, domain_id)
+    users = [member['memberDetails']['user'] for project in projects for member in project.get('_project_memberships', []) if 'user' in member['memberDetails']]
+    user_ids = list(dict.fromkeys(user['userId'] for user in users))
+
+    # second level calls are flattened in a single pool to avoid nesting worker pools
+    tasks = [(load_environment, environment) for project in projects for environment in project['_environments']]
+    tasks += [(directory.get, user_id) for user_id in user_ids]
+    run_parallel(lambda task: task[0](task[1]), tasks)
+    directory.save()
+    for user in users:
+        user['_user_details'] = directory.get(user['userId'])['details']
+    return projects
+
+def iter_projects(domain_id, level=FULL):
+    """Lazily yield the projects of a domain, each page is enriched in parallel before being yielded."""
+    datazone = get_client('datazone')
+    for page in iter_pages(datazone.list_projects, 'items', domainIdentifier=domain_id):
+        yield from enrich_projects(datazone, domain_id, page, level)
+
+def list_all_projects(domain_id, level=FULL):
+    return list(iter_projects(domain_id, level))
+
+def find_project_summary(domain_id, name):
+    """Return the list_projects item of the project with the given name, using the server side name filter."""
+    datazone = get_client('datazone')
+    # the name filter is not an exact match, the results are checked on the client side
+    for project in paginate(datazone.list_projects, 'items', domainIdentifier=domain_id, name=name):
+        if project['name'] == name:
+            return project
+    return None
+
+def resolve_project_id(domain_id, name):
+    project_id = cache.get('project', domain_id, name)
+    if project_id:
+        return project_id
+    project = find_project_summary(domain_id, name)
+    if not project:
+        raise click.ClickException(f"Project '{name}' not found in domain '{domain_id}'.")
+    cache.put('project', project['id'], domain_id, name)
+    return project['id']
+
+def find_project(domain_id, name, level=FULL):
+    """Return the project with the given name, only the matching project is enriched."""
+    project = find_project_summary(domain_id, name)
+    if not project:
+        return None
+    return enrich_projects(get_client('datazone'), domain_id, [project], level)[0]
 
 def get_profile(domain_id, name):
-    datazone = boto3.client('datazone')
-    project_profiles = datazone.list_project_profiles(domainIdentifier=domain_id, name=name)['items']
-    if len(project_profiles) == 0:
-        raise click.ClickException(f"Project profile '{name}' not found in domain '{domain_id}'.")
-    return project_profiles[0]['id']
+    project_profile_id = cache.get('profile', domain_id, name)
+    if project_profile_id:
+        return project_profile_id
+    datazone = get_client('datazone')
+    for project_profile in paginate(datazone.list_project_profiles, 'items', domainIdentifier=domain_id, name=name):
+        if project_profile['name'] == name:
+            cache.put('profile', project_profile['id'], domain_id, name)
+            return project_profile['id']
+    raise click.ClickException(f"Project profile '{name}' not found in domain '{domain_id}'.")
     
\ No newline at end of file
@@ -1,10 +1,16 @@
 import click
 import json
-import boto3
-from sm.commands.utils import get_domain_id
+from sm.commands.clients import get_client
+from sm.commands import cache
+from sm.commands.utils import get_domain_id, run_parallel, ENVIRONMENTS
 from sm.commands.projects import get_project
+from sm.commands.polling import Poller, poll, guarded
+from sm.commands.output import print_table
+from datetime import datetime
+import csv
+import itertools
+import math
 import time
-import sys
 
 @click.group()
 def workflows():
@@ -13,7 +19,7 @@ def workflows():
 
 
 def get_environment(domain_id, name):
-    project = get_project(domain_id, name)
+    project = get_project(domain_id, name, ENVIRONMENTS)
     if not project:
         raise click.BadParameter(f"Project '{name}' not found in domain '{domain_id}'.")
     environments = project.get('_environments', [])
@@ -26,6 +32,9 @@ def get_environment(domain_id, name):
 
 
 def get_environment_name(domain_id, project_name):
+    name = cache.get('mwaa', domain_id, project_name)
+    if name:
+        return name
     environment = get_environment(domain_id, project_name)                
     if not environment:
         raise click.BadParameter(f"Workflow environment not found in project '{project_name}'.")
@@ -35,6 +44,8 @@ def get_environment_name(domain_id, project_name):
         if rsc.get('name') == "mwaaEnvironmentArn":
             name = rsc.get('value').split('/')[-1]
             break
+    if name:
+        cache.put('mwaa', name, domain_id, project_name)
     return name
 
 
@@ -69,6 +80,24 @@ def describe(domain_id, domain_name, project_name, short):
         click.get_current_context().exit(1)
 
 
+def iter_airflow(client, env_name, path, result_key, query=None, page_size=100):
+    """Lazily yield the items of a paginated Airflow REST API collection, pages are fetched on demand (limit/offset)."""
+    offset = 0
+    while True:
+        request_params = {
+            "Name": env_name,
+            "Path": path,
+            "Method": "GET",
+            "QueryParameters": dict(query or {}, limit=page_size, offset=offset)
+        }
+        response = client.invoke_rest_api(**request_params)['RestApiResponse']
+        items = response.get(result_key, [])
+        yield from items
+        offset += len(items)
+        if not items or offset >= response.get('total_entries', 0):
+            return
+
+
 @workflows.command(name='list-dags')
 @click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
 @click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
@@ -81,19 +110,8 @@ def list_dags(domain_id, domain_name, project_name, account):
         name = get_environment_name(domain_id, project_name)
         if not name:
             raise click.BadParameter(f"MWAA environment ARN not found in project '{project_name}'.")
-        if account == 'default':
-            client = boto3.client("mwaa", aws_account_id='183631307357')
-        else:
-            session = boto3.Session(profile_name=account, region_name='us-east-1')
-            client = session.client("mwaa")
-        request_params = {
-            "Name": name,
-            "Path": "/dags",
-            "Method": "GET",
-            "QueryParameters": { "paused": False }
-        }
-        response = client.invoke_rest_api(**request_params)
-        for dag in response['RestApiResponse']['dags']:
+        client = get_client('mwaa', account)
+        for dag in iter_airflow(client, name, "/dags", 'dags', { "paused": False }):
             dag_id = dag['dag_id']
             dag_name = dag['dag_display_name']
             click.echo(f"{dag_name} - {dag_id}")
@@ -103,34 +121,47 @@ def list_dags(domain_id, domain_name, project_name, account):
         click.get_current_context().exit(1)
 
 
-def trigger_dag(client, env_name, dag_name):
+def trigger_dag(client, env_name, dag_name, conf=None):
     request_params = {
         "Name": env_name,
         "Path": f"/dags/{dag_name}/dagRuns",
         "Method": "POST"
     }
+    if conf is not None:
+        request_params["Body"] = { "conf": conf }
     response = client.invoke_rest_api(**request_params)
     run_id = response['RestApiResponse']['dag_run_id']
     return run_id
 
 
-def wait_for_dag(client, env_name, dag_name, run_id):
+# Airflow DAG run states which are not final
+PENDING_STATES = ['queued', 'running']
+DAG_TIMEOUT = 12 * 3600
+
+
+def get_dag_run_state(client, env_name, dag_name, run_id):
     request_params = {
         "Name": env_name,
         "Path": f"/dags/{dag_name}/dagRuns/{run_id}",
         "Method": "GET"
     }
-    t = 30
-    status = 'failed'
-    while True:
-        response = client.invoke_rest_api(**request_params)
-        status = response['RestApiResponse']['state']
-        if status != 'running' and status != 'queued':
-            break
-        else:
-            click.echo(f"✅ DAGrun '{run_id}' status: {status} (waiting {t} seconds...)")
-        time.sleep(t)
-    return status
+    response = client.invoke_rest_api(**request_params)
+    return response['RestApiResponse']['state']
+
+
+def dag_run_check(client, env_name, dag_name, run_id):
+    """Build a poller check returning (done, state) for a DAG run."""
+    def check():
+        state = get_dag_run_state(client, env_name, dag_name, run_id)
+        return state not in PENDING_STATES, state
+    return check
+
+
+def wait_for_dag(client, env_name, dag_name, run_id, timeout=DAG_TIMEOUT):
+    def on_update(status):
+        if status in PENDING_STATES:
+            click.echo(f"✅ DAGrun '{run_id}' status: {status}")
+    return poll(dag_run_check(client, env_name, dag_name, run_id), f"DAG run '{run_id}'", timeout=timeout, on_update=on_update)
 
 
 @workflows.command(name='run-dag')
@@ -140,21 +171,18 @@ def wait_for_dag(client, env_name, dag_name, run_id):
 @click.option('--name', required=True, help='The name of the DAG to execute')
 @click.option('--account', required=True, default='default', help='The AWS account profile name')
 @click.option('--wait', is_flag=True, default=False, help='Wait for completion')
-def run_dag(domain_id, domain_name, project_name, name, account, wait):
+@click.option('--timeout', type=click.IntRange(min=1), default=DAG_TIMEOUT, show_default=True, help='Maximum number of seconds to wait for completion')
+def run_dag(domain_id, domain_name, project_name, name, account, wait, timeout):
     """Trigger the execution of a specific DAG in a project's workflow environment."""
     try:
         domain_id = get_domain_id(domain_name, domain_id)
         env_name = get_environment_name(domain_id, project_name)                
         if not name:
             raise click.BadParameter(f"MWAA environment ARN not found in project '{name}'.")
-        if account == 'default':
-            client = boto3.client("mwaa", region_name='us-east-1')
-        else:
-            session = boto3.Session(profile_name=account, region_name='us-east-1')
-            client = session.client("mwaa")
+        client = get_client('mwaa', account)
         run_id = trigger_dag(client, env_name, name)
         if wait == True:
-            status = wait_for_dag(client, env_name, name, run_id)
+            status = wait_for_dag(client, env_name, name, run_id, timeout)
             click.echo(f"✅ DAG '{name}' / '{run_id}' / status: {status}")
             if status != 'success':
                 raise click.ClickException(f"DAG '{name}' failed with status: {status}")
@@ -172,23 +200,375 @@ def run_dag(domain_id, domain_name, project_name, name, account, wait):
 @click.option('--name', required=True, help='The name of the DAG to execute')
 @click.option('--run-id', required=True, help='The run ID of the DAG to check')
 @click.option('--account', required=True, default='default', help='The AWS account profile name')
-def check_dag(domain_id, domain_name, project_name, name, run_id, account):
+@click.option('--timeout', type=click.IntRange(min=1), default=DAG_TIMEOUT, show_default=True, help='Maximum number of seconds to wait for completion')
+def check_dag(domain_id, domain_name, project_name, name, run_id, account, timeout):
     """Check the status of a specific DAG in a project's workflow environment."""
     try:
         domain_id = get_domain_id(domain_name, domain_id)
         env_name = get_environment_name(domain_id, project_name)                
         if not name:
             raise click.BadParameter(f"MWAA environment ARN not found in project '{name}'.")
-        session = boto3.Session(profile_name=account, region_name='us-east-1')
-        client = session.client("mwaa")
-        status = wait_for_dag(client, env_name, name, run_id)
+        client = get_client('mwaa', account)
+        status = wait_for_dag(client, env_name, name, run_id, timeout)
         click.echo(f"✅ DAGrun '{run_id}' status: {status}")
     except Exception as e:
         click.echo(f"❌ Error listing dags: {str(e)}", err=True)
         click.get_current_context().exit(1)
 
 
-def register_commands(cli):
-    """Register workflow commands with the main CLI"""
-    cli.add_command(workflows)
+@workflows.command(name='watch')
+@click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
+@click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
+@click.option('--run', 'runs', required=True, multiple=True, help='A DAG run to watch as ACCOUNT:PROJECT:DAG:RUN_ID, repeat the option to watch several runs')
+@click.option('--timeout', type=click.IntRange(min=1), default=DAG_TIMEOUT, show_default=True, help='Maximum number of seconds to wait for all the runs')
+def watch(domain_id, domain_name, runs, timeout):
+    """Wait for several DAG runs, possibly in different accounts and projects, to complete.
+
+    Example:
+        sm workflows watch --domain-name my-domain --run dev:project_a:etl:manual__2025-01-01T00:00:00+00:00 --run prod:project_b:etl:scheduled__2025-01-01T00:00:00+00:00
+    """
+    try:
+        domain_id = get_domain_id(domain_name, domain_id)
+        poller = Poller(timeout=timeout)
+        for run in runs:
+            parts = run.split(':', 3)
+            if len(parts) != 4:
+                raise click.BadParameter(f"Invalid run '{run}', expected ACCOUNT:PROJECT:DAG:RUN_ID.")
+            account, project_name, dag_name, run_id = parts
+            env_name = get_environment_name(domain_id, project_name)
+            if not env_name:
+                raise click.BadParameter(f"MWAA environment ARN not found in project '{project_name}'.")
+            poller.add((account, project_name, dag_name, run_id), dag_run_check(get_client('mwaa', account), env_name, dag_name, run_id))
+
+        states = {}
+        def on_update(key, state):
+            if states.get(key) != state:
+                click.echo(f"✅ DAGrun '{key[3]}' ({key[0]}/{key[1]}/{key[2]}) status: {state}")
+            states[key] = state
+        poller.run(on_update)
+
+        failed = [key for key, state in states.items() if state != 'success']
+        if failed:
+            raise click.ClickException(f"{len(failed)} of {len(states)} DAG runs did not succeed.")
+        click.echo(f"✅ All {len(states)} DAG runs succeeded.")
+    except Exception as e:
+        click.echo(f"❌ Error watching dags: {str(e)}", err=True)
+        click.get_current_context().exit(1)
+
+
+def load_manifest_entries(manifest):
+    """Read and validate the entries of a run-batch manifest."""
+    with open(manifest, 'r') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise click.BadParameter("The manifest must be a list of entries.")
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise click.BadParameter(f"Manifest entry {i}: expected an object with account, project, dag and conf.")
+        for key in ['project', 'dag']:
+            if not entry.get(key) or not isinstance(entry[key], str):
+                raise click.BadParameter(f"Manifest entry {i}: missing {key}.")
+        if not isinstance(entry.get('conf') or {}, dict):
+            raise click.BadParameter(f"Manifest entry {i}: conf must be an object.")
+        entry['account'] = entry.get('account') or 'default'
+    return entries
+
+
+def print_batch_summary(results):
+    rows = [('ACCOUNT', 'PROJECT', 'DAG', 'RUN ID', 'STATUS', 'DURATION', 'EXIT')]
+    for result in results:
+        entry = result['entry']
+        duration = f"{result['duration']:.0f}s" if result['duration'] is not None else '-'
+        rows.append((entry['account'], entry['project'], entry['dag'], result['run_id'] or '-', result['state'], duration, str(result['exit_code'])))
+    print_table(rows)
+    for result in results:
+        if result['error']:
+            click.echo(f"❌ {result['entry']['project']}/{result['entry']['dag']}: {result['error']}", err=True)
+
+
+@workflows.command(name='run-batch')
+@click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
+@click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
+@click.option('--manifest', required=True, help='JSON file listing the DAG runs to trigger, each entry with account, project, dag and an optional conf')
+@click.option('--wait', is_flag=True, default=False, help='Wait for the completion of every run')
+@click.option('--timeout', type=click.IntRange(min=1), default=DAG_TIMEOUT, show_default=True, help='Maximum number of seconds to wait for all the runs')
+def run_batch(domain_id, domain_name, manifest, wait, timeout):
+    """Trigger several DAGs, possibly in different accounts and projects, and summarize the results.
+
+    Runs are triggered in parallel (see the global --concurrency option).
+
+    Example:
+        sm workflows run-batch --domain-name my-domain --manifest promotion.json --wait
+
+    With promotion.json:
+        [ { "account": "dev", "project": "project_a", "dag": "etl", "conf": { "date": "2025-01-01" } },
+          { "account": "prod", "project": "project_b", "dag": "etl" } ]
+    """
+    try:
+        domain_id = get_domain_id(domain_name, domain_id)
+        entries = load_manifest_entries(manifest)
+
+        # each project is resolved once, the MWAA clients are shared through the client registry
+        # a project which cannot be resolved only fails its own entries
+        def resolve(project):
+            try:
+                return get_environment_name(domain_id, project)
+            except Exception as e:
+                return e
+        projects = list(dict.fromkeys(entry['project'] for entry in entries))
+        env_names = dict(zip(projects, run_parallel(resolve, projects)))
+
+        def trigger(entry):
+            result = { 'entry': entry, 'run_id': None, 'state': 'error', 'error': None, 'duration': None, 'exit_code': 1, 'started': time.monotonic() }
+            try:
+                env_name = env_names[entry['project']]
+                if isinstance(env_name, Exception):
+                    raise env_name
+                if not env_name:
+                    raise click.BadParameter(f"MWAA environment ARN not found in project '{entry['project']}'.")
+                client = get_client('mwaa', entry['account'])
+                result['run_id'] = trigger_dag(client, env_name, entry['dag'], entry.get('conf'))
+                result['state'] = 'queued'
+                result['exit_code'] = 0
+                click.echo(f"✅ DAG '{entry['dag']}' triggered in {entry['project']} with run ID: {result['run_id']}")
+            except Exception as e:
+                result['error'] = str(e)
+            return result
+        results = run_parallel(trigger, entries)
+
+        if wait:
+            # a run whose state cannot be read ends in the error state
+            def on_error(i):
+                def record(e):
+                    results[i]['error'] = str(e)
+                    return 'error'
+                return record
+            poller = Poller(timeout=timeout)
+            for i, result in enumerate(results):
+                if result['run_id']:
+                    entry = result['entry']
+                    client = get_client('mwaa', entry['account'])
+                    poller.add(i, guarded(dag_run_check(client, env_names[entry['project']], entry['dag'], result['run_id']), on_error(i)))
+            def on_update(i, state):
+                result = results[i]
+                result['state'] = state
+                if state not in PENDING_STATES:
+                    result['duration'] = time.monotonic() - result['started']
+                    result['exit_code'] = 0 if state == 'success' else 1
+            try:
+                poller.run(on_update)
+            except click.ClickException:
+                # the summary still reports the last known state of every run
+                for result in results:
+                    if result['run_id'] and result['duration'] is None:
+                        result['exit_code'] = 1
+                        result['error'] = f"Timed out after {timeout} seconds"
+
+        print_batch_summary(results)
+        failed = [result for result in results if result['exit_code'] != 0]
+        if failed:
+            raise click.ClickException(f"{len(failed)} of {len(results)} DAG runs failed.")
+    except Exception as e:
+        click.echo(f"❌ Error running dags: {str(e)}", err=True)
+        click.get_current_context().exit(1)
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
+
+def elapsed(start, end):
+    """Number of seconds between two Airflow timestamps, None when one of them is missing."""
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    if not start or not end:
+        return None
+    return (end - start).total_seconds()
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers."""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def duration_stats(dag_id, task_id, items, queued_key):
+    runs = [elapsed(item.get('start_date'), item.get('end_date')) for item in items]
+    queues = [elapsed(item.get(queued_key), item.get('start_date')) for item in items]
+    runs = [value for value in runs if value is not None]
+    queues = [value for value in queues if value is not None]
+    return {
+        'dag_id': dag_id,
+        'task_id': task_id,
+        'count': len(items),
+        'failed': len([item for item in items if item.get('state') == 'failed']),
+        'run_p50': percentile(runs, 50),
+        'run_p95': percentile(runs, 95),
+        'run_max': max(runs) if runs else None,
+        'queue_p50': percentile(queues, 50),
+        'queue_p95': percentile(queues, 95),
+        'queue_max': max(queues) if queues else None,
+    }
+
+
+@workflows.command(name='runs')
+@click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
+@click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
+@click.option('--project-name', required=True, help='The name of the project to retrieve')
+@click.option('--account', required=True, default='default', help='The AWS account profile name')
+@click.option('--dag', 'dags', multiple=True, help='DAG to analyze, repeat the option for several DAGs (default: all active DAGs)')
+@click.option('--limit', type=click.IntRange(min=1), default=100, show_default=True, help='Maximum number of recent runs analyzed per DAG')
+@click.option('--tasks/--no-tasks', default=True, show_default=True, help='Also compute per-task statistics (one more call per run)')
+@click.option('--format', 'output_format', type=click.Choice(['csv', 'json']), default='csv', show_default=True, help='Output format')
+@click.option('--output', type=click.File('w'), default='-', help='Output file (default: standard output)')
+def runs(domain_id, domain_name, project_name, account, dags, limit, tasks, output_format, output):
+    """Compute DAG and task duration statistics (p50/p95/max, run and queue times) from the run history.
+
+    Durations are in seconds, rows with an empty task_id are DAG-level statistics.
+
+    Example:
+        sm workflows runs --domain-name my-domain --project-name project_name --account dev
+        sm workflows runs --domain-name my-domain --project-name project_name --dag etl --format json --output etl.json
+    """
+    try:
+        domain_id = get_domain_id(domain_name, domain_id)
+        env_name = get_environment_name(domain_id, project_name)
+        if not env_name:
+            raise click.BadParameter(f"MWAA environment ARN not found in project '{project_name}'.")
+        client = get_client('mwaa', account)
+        if not dags:
+            dags = [dag['dag_id'] for dag in iter_airflow(client, env_name, "/dags", 'dags', { "paused": False })]
+
+        # runs of the different DAGs are fetched in parallel, most recent first
+        def load_runs(dag_id):
+            items = iter_airflow(client, env_name, f"/dags/{dag_id}/dagRuns", 'dag_runs', { "order_by": "-execution_date" }, page_size=min(limit, 100))
+            return list(itertools.islice(items, limit))
+        dag_runs = dict(zip(dags, run_parallel(load_runs, dags)))
+
+        # task instances of all the runs of all the DAGs are fetched in a single pool
+        task_instances = {}
+        if tasks:
+            def load_task_instances(run):
+                dag_id, run_id = run
+                return list(iter_airflow(client, env_name, f"/dags/{dag_id}/dagRuns/{run_id}/taskInstances", 'task_instances'))
+            all_runs = [(dag_id, dag_run['dag_run_id']) for dag_id in dags for dag_run in dag_runs[dag_id]]
+            for items in run_parallel(load_task_instances, all_runs):
+                for item in items:
+                    task_instances.setdefault(item['dag_id'], {}).setdefault(item['task_id'], []).append(item)
+
+        rows = []
+        for dag_id in dags:
+            rows.append(duration_stats(dag_id, '', dag_runs[dag_id], 'queued_at'))
+            for task_id, items in sorted(task_instances.get(dag_id, {}).items()):
+                rows.append(duration_stats(dag_id, task_id, items, 'queued_when'))
+
+        if output_format == 'json':
+            output.write(json.dumps(rows, indent=2, default=str) + '\n')
+        else:
+            writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()) if rows else ['dag_id'])
+            writer.writeheader()
+            writer.writerows(rows)
+    except Exception as e:
+        click.echo(f"❌ Error computing dag runs statistics: {str(e)}", err=True)
+        click.get_current_context().exit(1)
+
+
+# Airflow task instance states after which no more log is written
+FINISHED_TASK_STATES = ['success', 'failed', 'skipped', 'upstream_failed', 'removed']
+
+
+class TaskLogTail:
+    """Incrementally read the logs of the task instances of a DAG run.
+
+    Airflow returns a continuation token with each chunk of log, the next request only returns the content written since.
+    """
+
+    def __init__(self, client, env_name, dag_name, run_id, task_ids=None):
+        self.client = client
+        self.env_name = env_name
+        self.dag_name = dag_name
+        self.run_id = run_id
+        self.task_ids = task_ids
+        # (task_id, try_number) -> continuation token, and the logs which have been read completely
+        self.tokens = {}
+        self.complete = set()
+
+    def read(self, key):
+        task_id, try_number = key
+        query = { "full_content": False }
+        if self.tokens.get(key):
+            query["token"] = self.tokens[key]
+        request_params = {
+            "Name": self.env_name,
+            "Path": f"/dags/{self.dag_name}/dagRuns/{self.run_id}/taskInstances/{task_id}/logs/{try_number}",
+            "Method": "GET",
+            "QueryParameters": query
+        }
+        response = self.client.invoke_rest_api(**request_params)['RestApiResponse']
+        self.tokens[key] = response.get('continuation_token') or self.tokens.get(key)
+        return response.get('content') or ''
+
+    def fetch(self):
+        """Fetch the new log content of every task in parallel, and print it prefixed with the task id."""
+        task_instances = iter_airflow(self.client, self.env_name, f"/dags/{self.dag_name}/dagRuns/{self.run_id}/taskInstances", 'task_instances')
+        keys = []
+        finished = set()
+        for task_instance in task_instances:
+            if self.task_ids and task_instance['task_id'] not in self.task_ids:
+                continue
+            if not task_instance.get('try_number'):
+                continue  # not started yet
+            key = (task_instance['task_id'], task_instance['try_number'])
+            if key in self.complete:
+                continue
+            keys.append(key)
+            if task_instance.get('state') in FINISHED_TASK_STATES:
+                finished.add(key)
+        for key, content in zip(keys, run_parallel(self.read, keys)):
+            for line in content.splitlines():
+                click.echo(f"[{key[0]}:{key[1]}] {line}")
+        # a finished task has been read after its last write, it is not requested anymore
+        self.complete |= finished
+
+
+@workflows.command(name='logs')
+@click.option('--domain-id', required=False, help='The ID of the domain (optional if --domain-name is provided)')
+@click.option('--domain-name', required=False, help='The name of the domain (optional if --domain-id is provided)')
+@click.option('--project-name', required=True, help='The name of the project to retrieve')
+@click.option('--name', required=True, help='The name of the DAG')
+@click.option('--run-id', required=True, help='The run ID of the DAG')
+@click.option('--task', 'task_ids', multiple=True, help='Task to show, repeat the option for several tasks (default: all tasks)')
+@click.option('--account', required=True, default='default', help='The AWS account profile name')
+@click.option('--follow', is_flag=True, default=False, help='Keep reading the new log content until the DAG run completes')
+@click.option('--timeout', type=click.IntRange(min=1), default=DAG_TIMEOUT, show_default=True, help='Maximum number of seconds to follow the logs')
+def logs(domain_id, domain_name, project_name, name, run_id, task_ids, account, follow, timeout):
+    """Show the task logs of a DAG run, fetched in parallel across tasks.
+
+    Example:
+        sm workflows logs --domain-name my-domain --project-name project_name --name etl --run-id manual__2025-01-01T00:00:00+00:00
+        sm workflows logs --domain-name my-domain --project-name project_name --name etl --run-id <run_id> --task load --follow
+    """
+    try:
+        domain_id = get_domain_id(domain_name, domain_id)
+        env_name = get_environment_name(domain_id, project_name)
+        if not env_name:
+            raise click.BadParameter(f"MWAA environment ARN not found in project '{project_name}'.")
+        client = get_client('mwaa', account)
+        tail = TaskLogTail(client, env_name, name, run_id, task_ids)
+        if not follow:
+            tail.fetch()
+            return
+
+        def check():
+            # the state is read before the logs, so the last fetch happens after the run completed
+            state = get_dag_run_state(client, env_name, name, run_id)
+            tail.fetch()
+            return state not in PENDING_STATES, state
+        status = poll(check, f"DAG run '{run_id}'", timeout=timeout, maximum=15)
+        click.echo(f"✅ DAGrun '{run_id}' status: {status}")
+    except Exception as e:
+        click.echo(f"❌ Error reading dag logs: {str(e)}", err=True)
+        click.get_current_context().exit(1)
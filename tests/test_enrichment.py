@@ -0,0 +1,26 @@
+"""Offline test of the project enrichment engine, with the stubbed DataZone client of the benchmark."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.enrichment import run
+from sm.commands import cache, parallel
+
+# 30 projects with 2 environments and 2 members, about 150 calls of 10 ms each
+SIZES = (30, 2, 2, 0.01)
+
+
+def test_parallel_enrichment_matches_sequential_and_is_faster():
+    try:
+        sequential, sequential_time, sequential_calls = run(*SIZES, 1)
+        result, parallel_time, parallel_calls = run(*SIZES, 8)
+    finally:
+        parallel.set_concurrency(parallel.DEFAULT_CONCURRENCY)
+        cache.configure()
+    assert [project['id'] for project in result] == [f'p{i}' for i in range(SIZES[0])]
+    assert json.dumps(result, default=str) == json.dumps(sequential, default=str)
+    assert parallel_calls == sequential_calls
+    # 8 workers on latency bound calls, a 2x margin absorbs the scheduling noise of a loaded machine
+    assert parallel_time * 2 < sequential_time, f"sequential {sequential_time:.2f}s, parallel {parallel_time:.2f}s"